@@ -0,0 +1,272 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class ArtifactNotFound(Exception):
+    """Raised when an upload ID is unknown, malformed or its artifacts have expired."""
+
+
+class QuotaExceeded(Exception):
+    """Raised when the artifacts of an upload do not fit in the disk quota of the store."""
+
+
+class ArtifactStore:
+    """
+    Per-upload store of the files produced while processing a CSV upload (processed data, data type map).
+
+    Every upload gets its own directory named after a random upload ID, which is returned to the client by
+    /types/ and sent back to /save-types/, so concurrent users never overwrite each other's files. The store
+    only relies on a local directory, several workers can share it.
+
+    Args:
+        root (str): The directory holding one sub-directory per upload.
+        ttl (int): Seconds after the last access before the artifacts of an upload are evicted.
+        quota (int): Maximum total size of all artifacts in bytes, the least recently used uploads are
+                     evicted first when it is exceeded.
+
+    Note:
+        Files are written to a temporary name and renamed into place, a reader never sees a partial file.
+    """
+
+    UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+    def __init__(self, root, ttl, quota):
+        self.root = root
+        self.ttl = ttl
+        self.quota = quota
+        os.makedirs(self.root, exist_ok=True)
+
+    def create(self, upload_id=None):
+        """
+        Create the directory of a new upload, evicting expired uploads first.
+
+        Args:
+            upload_id (str, optional): The ID to use instead of a random one (an existing directory is kept).
+
+        Returns:
+            str: The new upload ID.
+        """
+        self.evict_expired()
+        upload_id = upload_id or uuid.uuid4().hex
+        os.makedirs(os.path.join(self.root, upload_id), exist_ok=True)
+        return upload_id
+
+    def path(self, upload_id, name):
+        """
+        Get the path of an artifact of an existing upload and mark the upload as recently used.
+
+        Args:
+            upload_id (str): The upload ID returned by create().
+            name (str): The file name of the artifact (e.g. "dtype_map.json").
+
+        Returns:
+            str: The path of the artifact (the file itself may not exist yet).
+
+        Raises:
+            ArtifactNotFound: If the upload ID is malformed, unknown or expired.
+        """
+        directory = self.directory(upload_id)
+        os.utime(directory)
+        return os.path.join(directory, name)
+
+    def directory(self, upload_id):
+        """
+        Get the directory of an existing upload.
+
+        Args:
+            upload_id (str): The upload ID returned by create().
+
+        Returns:
+            str: The directory of the upload.
+
+        Raises:
+            ArtifactNotFound: If the upload ID is malformed, unknown or expired.
+        """
+        # Only our own IDs are accepted, an ID can never point outside of the store
+        if not isinstance(upload_id, str) or not self.UPLOAD_ID_PATTERN.match(upload_id):
+            raise ArtifactNotFound(upload_id)
+
+        directory = os.path.join(self.root, upload_id)
+        try:
+            modified = os.path.getmtime(directory)
+        except FileNotFoundError:
+            raise ArtifactNotFound(upload_id)
+        if time.time() - modified > self.ttl:
+            self.delete(upload_id)
+            raise ArtifactNotFound(upload_id)
+        return directory
+
+    @contextmanager
+    def open_atomic(self, upload_id, name):
+        """
+        Context manager giving a temporary path to write an artifact to, moved into place on success.
+
+        Args:
+            upload_id (str): The upload ID returned by create().
+            name (str): The file name of the artifact.
+
+        Yields:
+            str: The temporary path to write to.
+        """
+        final_path = self.path(upload_id, name)
+        temporary_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            yield temporary_path
+            os.replace(temporary_path, final_path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def write_json(self, upload_id, name, data):
+        """
+        Atomically write a JSON artifact.
+
+        Args:
+            upload_id (str): The upload ID returned by create().
+            name (str): The file name of the artifact.
+            data: The JSON serializable data.
+        """
+        with self.open_atomic(upload_id, name) as temporary_path:
+            with open(temporary_path, 'w') as f:
+                json.dump(data, f)
+
+    def read_json(self, upload_id, name):
+        """
+        Read a JSON artifact.
+
+        Args:
+            upload_id (str): The upload ID returned by create().
+            name (str): The file name of the artifact.
+
+        Returns:
+            The data of the artifact.
+
+        Raises:
+            ArtifactNotFound: If the upload or the artifact does not exist.
+        """
+        try:
+            with open(self.path(upload_id, name), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ArtifactNotFound(upload_id)
+
+    def copy(self, upload_id, name, destination):
+        """
+        Copy an artifact to another path, as a hard link when possible.
+
+        Args:
+            upload_id (str): The upload ID returned by create().
+            name (str): The file name of the artifact.
+            destination (str): The path of the copy.
+
+        Raises:
+            ArtifactNotFound: If the upload or the artifact does not exist.
+
+        Note:
+            Artifacts are only ever replaced (see open_atomic), never modified in place, so a hard link is safe.
+        """
+        try:
+            link_or_copy(self.path(upload_id, name), destination)
+        except FileNotFoundError:
+            raise ArtifactNotFound(upload_id)
+
+    def delete(self, upload_id):
+        """
+        Delete all artifacts of an upload.
+
+        Args:
+            upload_id (str): The upload ID.
+        """
+        shutil.rmtree(os.path.join(self.root, upload_id), ignore_errors=True)
+
+    def uploads(self):
+        """
+        List the uploads of the store with their last access time and size.
+
+        Returns:
+            list: Tuples of (upload ID, last access timestamp, size in bytes), least recently used first.
+        """
+        uploads = []
+        for upload_id in os.listdir(self.root):
+            directory = os.path.join(self.root, upload_id)
+            if not self.UPLOAD_ID_PATTERN.match(upload_id) or not os.path.isdir(directory):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+                uploads.append((upload_id, os.path.getmtime(directory), size))
+            except FileNotFoundError:
+                # Evicted by another worker in the meantime
+                continue
+        return sorted(uploads, key=lambda upload: upload[1])
+
+    def evict_expired(self):
+        """
+        Delete the artifacts of all uploads not accessed for more than the TTL.
+        """
+        now = time.time()
+        for upload_id, accessed, _ in self.uploads():
+            if now - accessed > self.ttl:
+                self.delete(upload_id)
+
+    def enforce_quota(self, upload_id):
+        """
+        Evict the least recently used uploads until all artifacts fit in the quota.
+
+        Args:
+            upload_id (str): The upload that was just written, it is evicted last.
+
+        Raises:
+            QuotaExceeded: If the artifacts of `upload_id` alone exceed the quota (they are deleted).
+        """
+        uploads = self.uploads()
+        total = sum(size for _, _, size in uploads)
+        for other_id, _, size in uploads:
+            if total <= self.quota:
+                return
+            if other_id != upload_id:
+                self.delete(other_id)
+                total -= size
+
+        if total > self.quota:
+            self.delete(upload_id)
+            raise QuotaExceeded(upload_id)
+
+
+def link_or_copy(source, destination):
+    """
+    Hard link a file to a new path, or copy it if a link cannot be created (e.g. another file system).
+
+    Args:
+        source (str): The existing file.
+        destination (str): The new path, it must not exist yet.
+
+    Raises:
+        FileNotFoundError: If the source file does not exist.
+    """
+    try:
+        os.link(source, destination)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def get_artifact_store():
+    """
+    Create the artifact store configured in the Django settings.
+
+    Returns:
+        ArtifactStore: The store using CSV_ARTIFACT_ROOT, CSV_ARTIFACT_TTL_SECONDS and CSV_ARTIFACT_QUOTA_BYTES.
+    """
+    return ArtifactStore(
+        root=getattr(settings, 'CSV_ARTIFACT_ROOT', os.path.join('csvhandler', 'files', 'uploads')),
+        ttl=getattr(settings, 'CSV_ARTIFACT_TTL_SECONDS', 60 * 60),
+        quota=getattr(settings, 'CSV_ARTIFACT_QUOTA_BYTES', 5 * 1024 ** 3),
+    )
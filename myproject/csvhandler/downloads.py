@@ -0,0 +1,274 @@
+import os
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from csvhandler.processor.columnar import frame_to_arrow, parquet_table
+
+# Download formats: content type, file extension, default compression and accepted compressions
+DOWNLOAD_FORMATS = {
+    'csv': ('text/csv', 'csv', None, (None,)),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', 'snappy', ('snappy', 'gzip', 'brotli', 'zstd', 'lz4', 'none')),
+    'feather': ('application/vnd.apache.arrow.file', 'feather', 'lz4', ('lz4', 'zstd', 'none')),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', 'none', ('lz4', 'zstd', 'none')),
+}
+
+# A value that is not a multiple of one of these units (in ns) shows it in the CSV, finest unit first
+RESOLUTION_UNITS = [10 ** 3, 10 ** 6, 10 ** 9, 60 * 10 ** 9, 60 * 60 * 10 ** 9, 24 * 60 * 60 * 10 ** 9]
+
+
+def download_batch_rows():
+    """
+    Get the number of rows encoded at a time by the downloads (one row group or record batch per batch).
+
+    Returns:
+        int: The CSV_DOWNLOAD_BATCH_ROWS setting.
+    """
+    return getattr(settings, 'CSV_DOWNLOAD_BATCH_ROWS', 50_000)
+
+
+class DownloadFormatError(ValueError):
+    """Raised when a download format or compression is not supported."""
+
+
+def download_format(data):
+    """
+    Read the download format requested by the client.
+
+    Args:
+        data (dict): The request data, with an optional "format" (csv, parquet, feather or arrow, csv by default)
+                     and an optional "compression" (see DOWNLOAD_FORMATS).
+
+    Returns:
+        tuple: The format and the compression (None for csv).
+
+    Raises:
+        DownloadFormatError: If the format or the compression is not supported.
+    """
+    file_format = data.get('format') or 'csv'
+    if file_format not in DOWNLOAD_FORMATS:
+        raise DownloadFormatError(f"Unsupported format: {file_format}. Use one of {', '.join(DOWNLOAD_FORMATS)}.")
+
+    _, _, default_compression, compressions = DOWNLOAD_FORMATS[file_format]
+    compression = data.get('compression') or default_compression
+    if compression not in compressions:
+        raise DownloadFormatError(f"Unsupported compression for {file_format}: {compression}.")
+    return file_format, compression
+
+
+def download_chunks(batches, file_format, compression):
+    """
+    Encode DataFrames as one file of the given format.
+
+    Args:
+        batches (callable): Returns a new iterator of the DataFrames to encode (see csv_chunks).
+        file_format (str): A format of DOWNLOAD_FORMATS.
+        compression (str): A compression accepted by the format.
+
+    Returns:
+        iterator: The bytes of the file, one batch at a time.
+    """
+    if file_format == 'csv':
+        return csv_chunks(batches)
+    return arrow_chunks(batches, file_format, compression)
+
+
+def download_name(name, file_format):
+    """
+    File name of a download.
+
+    Args:
+        name (str): The file name without extension.
+        file_format (str): A format of DOWNLOAD_FORMATS.
+
+    Returns:
+        str: The file name with the extension of the format.
+    """
+    return f"{name}.{DOWNLOAD_FORMATS[file_format][1]}"
+
+
+def download_content_type(file_format):
+    """
+    Content type of a download.
+
+    Args:
+        file_format (str): A format of DOWNLOAD_FORMATS.
+
+    Returns:
+        str: The content type of the format.
+    """
+    return DOWNLOAD_FORMATS[file_format][0]
+
+
+def frame_batches(df, batch_rows):
+    """
+    Split a DataFrame into batches of rows, without copying it.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+        batch_rows (int): Maximum number of rows per batch.
+
+    Yields:
+        pd.DataFrame: The next rows (the empty DataFrame itself if it has no rows).
+    """
+    if df.empty:
+        yield df
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows]
+
+
+def csv_chunks(batches):
+    """
+    Encode DataFrames as one CSV document, the same as the concatenated DataFrames written with to_csv(index=False).
+
+    Args:
+        batches (callable): Returns a new iterator of the DataFrames to encode (e.g. frame_batches), it is
+                            called twice.
+
+    Yields:
+        bytes: The header, then the rows of one DataFrame at a time, encoded in UTF-8.
+
+    Note:
+        pandas chooses how to write dates and time intervals from the whole column (a column of dates at midnight
+        is written without the time, milliseconds are only written if a value has some), a batch on its own could
+        be written differently. The first pass over the batches finds, in every such column, the value with the
+        finest resolution; it is prepended to every batch before encoding and its line is dropped from the output.
+    """
+    witnesses = {}
+    ranks = {}
+    for batch in batches():
+        for col in batch.columns:
+            found = finest_resolution(batch[col])
+            if found is not None and found[0] < ranks.get(col, len(RESOLUTION_UNITS)):
+                ranks[col], witnesses[col] = found
+
+    header = True
+    for batch in batches():
+        if header:
+            yield batch.iloc[:0].to_csv(index=False).encode()
+            header = False
+        if batch.empty:
+            continue
+
+        if not witnesses:
+            yield batch.to_csv(index=False, header=False).encode()
+            continue
+
+        witness_row = batch.iloc[:1].copy()
+        for position, col in enumerate(batch.columns):
+            if col in witnesses:
+                witness_row.iloc[0, position] = witnesses[col]
+            elif batch[col].dtype.kind not in 'biufcmM':
+                # Text could hold a line break, the witness line must be exactly one line
+                witness_row.iloc[0, position] = np.nan
+
+        text = pd.concat([witness_row, batch]).to_csv(index=False, header=False)
+        yield text.partition(os.linesep)[2].encode()
+
+
+def arrow_chunks(batches, file_format, compression):
+    """
+    Encode DataFrames as one Parquet file (one row group per DataFrame), Feather file or Arrow IPC stream.
+
+    Args:
+        batches (callable): Returns a new iterator of the DataFrames to encode, it is called once.
+        file_format (str): "parquet", "feather" or "arrow".
+        compression (str): A compression accepted by the format ("none" for none).
+
+    Yields:
+        bytes: The file, one batch at a time.
+
+    Note:
+        The schema embeds the pandas data types (Int8, category, ...), a reader gets the inferred data types back
+        without parsing anything. Complex numbers are written as text (see columnar.frame_to_arrow), float16 columns
+        are written to Parquet as float32 (see columnar.parquet_table).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    compression = None if compression == 'none' else compression
+    sink = ChunkSink()
+    output = pa.PythonFile(sink, mode='w')
+    writer = schema = None
+    try:
+        for batch in batches():
+            # Every batch is converted to the schema of the first one
+            table = frame_to_arrow(batch, schema)
+            if writer is None:
+                schema = table.schema
+            if file_format == 'parquet':
+                table = parquet_table(table)
+            if writer is None:
+                if file_format == 'parquet':
+                    writer = pq.ParquetWriter(output, table.schema, compression=compression or 'none')
+                else:
+                    options = pa.ipc.IpcWriteOptions(compression=compression)
+                    new_writer = pa.ipc.new_file if file_format == 'feather' else pa.ipc.new_stream
+                    writer = new_writer(output, schema, options=options)
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+class ChunkSink:
+    """
+    Write-only file keeping what is written until it is drained, the output of arrow_chunks.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        """
+        Get and forget what was written since the last call.
+
+        Returns:
+            bytes: The data written.
+        """
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def finest_resolution(column):
+    """
+    Find the value of a date or time interval column whose written form depends on the rest of the column.
+
+    Args:
+        column (pd.Series): The column.
+
+    Returns:
+        tuple: The rank of the finest unit used by the column in RESOLUTION_UNITS and a value using it, or None if
+               the column is not a date (without time zone) or time interval column, or all values are whole days.
+    """
+    # Dates with a time zone are written value by value
+    if not isinstance(column.dtype, np.dtype) or column.dtype.kind not in 'mM':
+        return None
+
+    values = column.to_numpy().view(np.int64)
+    valid = column.notna().to_numpy()
+    for rank, unit in enumerate(RESOLUTION_UNITS):
+        hits = np.flatnonzero(valid & (values % unit != 0))
+        if len(hits):
+            return rank, column.iloc[hits[0]]
+    return None
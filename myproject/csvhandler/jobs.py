@@ -0,0 +1,169 @@
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class JobQueue(ABC):
+    """
+    Queue running the processing of uploads in the background, outside of the request.
+
+    Tasks are given as the dotted path of a function and JSON serializable arguments, so a backend can hand them
+    to another process or machine (e.g. a message broker). The backend is chosen with the CSV_JOB_QUEUE_BACKEND
+    setting and built with the CSV_JOB_QUEUE_OPTIONS keyword arguments.
+
+    Note:
+        A task reports its progress and result through the artifact store (see JobProgress), never through the
+        queue, so every backend only has to run it.
+    """
+
+    @abstractmethod
+    def submit(self, task, *args):
+        """
+        Queue a task.
+
+        Args:
+            task (str): The dotted path of the function to run, e.g. "csvhandler.views.run_types_job".
+            *args: The JSON serializable arguments of the function.
+        """
+
+
+class LocalJobQueue(JobQueue):
+    """
+    Runs the tasks on a pool of threads of the current process.
+
+    Args:
+        workers (int, optional): Number of threads, tasks wait in the queue when all of them are busy.
+    """
+
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='csv-job')
+
+    def submit(self, task, *args):
+        self.executor.submit(import_string(task), *args)
+
+
+class InlineJobQueue(JobQueue):
+    """
+    Runs the tasks immediately, inside the request (tests and debugging).
+
+    Args:
+        **options: Ignored, so the CSV_JOB_QUEUE_OPTIONS of another backend (e.g. workers) can stay in the settings.
+    """
+
+    def __init__(self, **options):
+        pass
+
+    def submit(self, task, *args):
+        import_string(task)(*args)
+
+
+# Job queue shared by all requests of this process, created on first use
+_job_queue = None
+
+
+def get_job_queue():
+    """
+    Get the job queue configured in the Django settings, creating it on first use.
+
+    Returns:
+        JobQueue: An instance of CSV_JOB_QUEUE_BACKEND built with CSV_JOB_QUEUE_OPTIONS.
+    """
+    global _job_queue
+    if _job_queue is None:
+        backend = import_string(getattr(settings, 'CSV_JOB_QUEUE_BACKEND', 'csvhandler.jobs.LocalJobQueue'))
+        _job_queue = backend(**getattr(settings, 'CSV_JOB_QUEUE_OPTIONS', {}))
+    return _job_queue
+
+
+class JobProgress:
+    """
+    Status of a background job, saved as "job.json" with the artifacts of its upload.
+
+    The job ID is the upload ID, every worker sharing the artifact store can report the status of any job.
+
+    Args:
+        store (ArtifactStore): The store of the upload.
+        job_id (str): The upload ID of the job.
+        interval (float): Minimum number of seconds between two writes of the progress.
+
+    Attributes:
+        status (str): "queued", "running", "done" or "failed".
+        rows (int): Number of rows read so far.
+        columns (int): Number of columns whose data type is decided so far.
+        total_columns (int): Number of columns of the upload (None until the header is read).
+        error (str): The reason of the failure (None unless failed).
+    """
+
+    def __init__(self, store, job_id, interval=1.0):
+        self.store = store
+        self.job_id = job_id
+        self.interval = interval
+        self.status = 'queued'
+        self.rows = 0
+        self.columns = 0
+        self.total_columns = None
+        self.error = None
+        self.saved_at = 0
+
+    def save(self):
+        """
+        Write the status of the job.
+        """
+        self.store.write_json(self.job_id, 'job.json', {
+            'status': self.status,
+            'rows': self.rows,
+            'columns': self.columns,
+            'total_columns': self.total_columns,
+            'error': self.error,
+        })
+        self.saved_at = time.monotonic()
+
+    def update(self, **fields):
+        """
+        Update some of the attributes, written at most every `interval` seconds.
+
+        Args:
+            **fields: The new values of rows, columns or total_columns.
+        """
+        for name, value in fields.items():
+            setattr(self, name, value)
+        if time.monotonic() - self.saved_at >= self.interval:
+            self.save()
+
+    def set_rows(self, rows):
+        """Progress callback of the processor: number of rows read so far."""
+        self.update(rows=rows)
+
+    def set_columns(self, columns):
+        """Progress callback of the processor: number of columns converted so far."""
+        self.update(columns=columns)
+
+    def start(self):
+        """Mark the job as running."""
+        self.status = 'running'
+        self.save()
+
+    def finish(self, columns):
+        """
+        Mark the job as done, its data type map is in the artifact store.
+
+        Args:
+            columns (int): Number of columns of the upload.
+        """
+        self.status = 'done'
+        self.columns = self.total_columns = columns
+        self.save()
+
+    def fail(self, error):
+        """
+        Mark the job as failed.
+
+        Args:
+            error (str): The reason, shown to the client.
+        """
+        self.status = 'failed'
+        self.error = error
+        self.save()
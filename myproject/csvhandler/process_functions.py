@@ -1,4 +1,5 @@
 from csvhandler.models import Student
+from csvhandler.processor.representation import SPARSE_SUBTYPES
 
 
 def map_dtypes_to_user_friendly_names(dtype_map):
@@ -14,20 +15,32 @@ def map_dtypes_to_user_friendly_names(dtype_map):
     # Define a mapping of dtypes to user-friendly names
     dtype_to_friendly_name = {
         "object": "Text",
+        "string": "Text",
         "Int64": "Integer64",
         "Int32": "Integer32",
         "Int16": "Integer16",
         "Int8": "Integer8",
+        "UInt64": "Unsigned Integer64",
+        "UInt32": "Unsigned Integer32",
+        "UInt16": "Unsigned Integer16",
+        "UInt8": "Unsigned Integer8",
         "float64": "Decimal64",
         "float32": "Decimal32",
+        "float16": "Decimal16",
         "datetime64[ns]": "Date",
         "datetime64[ns, UTC]": "Datetime(UTC)",
         "bool": "Boolean",
+        "boolean": "Boolean",
         "category": "Category",
         "timedelta64[ns]": "Time Interval",
         "complex128": "Complex Number",
     }
 
+    # Sparse columns (e.g. "Sparse[float32, nan]") are named after the data type of their values: "Sparse[Decimal32]"
+    dtype_to_friendly_name.update({
+        f"Sparse[{dtype}, nan]": f"Sparse[{dtype_to_friendly_name[dtype]}]" for dtype in SPARSE_SUBTYPES
+    })
+
     # Convert the dtype_map to user-friendly names
     user_friendly_map = {
         column_name: dtype_to_friendly_name.get(dtype, "Unknown Type")
@@ -53,8 +66,13 @@ def map_user_friendly_names_to_dtypes(friendly_map):
         "Integer32": "Int32",
         "Integer16": "Int16",
         "Integer8": "Int8",
+        "Unsigned Integer64": "UInt64",
+        "Unsigned Integer32": "UInt32",
+        "Unsigned Integer16": "UInt16",
+        "Unsigned Integer8": "UInt8",
         "Decimal64": "float64",
         "Decimal32": "float32",
+        "Decimal16": "float16",
         "Date": "datetime64[ns]",
         "Datetime(UTC)": "datetime64[ns, UTC]",
         "Boolean": "bool",
@@ -63,6 +81,12 @@ def map_user_friendly_names_to_dtypes(friendly_map):
         "Complex Number": "complex128",
     }
 
+    # Sparse columns, e.g. "Sparse[Decimal32]" for "Sparse[float32, nan]"
+    friendly_name_to_dtype.update({
+        f"Sparse[{friendly_name}]": f"Sparse[{dtype}, nan]"
+        for friendly_name, dtype in friendly_name_to_dtype.items() if dtype in SPARSE_SUBTYPES
+    })
+
     # Convert the friendly_map to dtypes
     dtype_map = {
         column_name: friendly_name_to_dtype.get(friendly_name, "object")
@@ -73,6 +97,33 @@ def map_user_friendly_names_to_dtypes(friendly_map):
 
 
 
+def get_column_details(report, dtype_map):
+    """
+    Regroups the report of the processing by column, for the front-end.
+
+    Parameters:
+        report (dict): The report filled by infer_and_convert_data_types, every entry maps column names to a value
+                       (or to a dict of values, e.g. the sample size and counterexamples of "sampling").
+        dtype_map (dict): A dictionary where keys are column names and values are Pandas dtype strings.
+
+    Returns:
+        dict: A dictionary where keys are column names, and values are dicts of the details of the column, e.g.
+              {'sample_size': 10000, 'counterexamples': 0, 'modified_cells': 3, 'skipped_converters': ['int']}.
+              Columns without any detail (e.g. reused from a previous upload) get an empty dict.
+    """
+    details = {column_name: {} for column_name in dtype_map}
+    for entry, values in report.items():
+        for column_name, value in values.items():
+            if column_name not in details:
+                continue
+            if isinstance(value, dict):
+                details[column_name].update(value)
+            else:
+                details[column_name][entry] = value
+
+    return details
+
+
 def get_differences(updated_map, DTYPES_MAP):
     """
     Identify differences between the updated data type map and the original data type map.
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas._libs.parsers import STR_NA_VALUES
+except ImportError:
+    from pandas.io.parsers.readers import STR_NA_VALUES
+
+from .data_wrangling import MISSING_VALUES
+
+# Values pd.read_csv reads as numbers (surrounding blanks allowed), checked before casting with Arrow
+INTEGER_PATTERN = r'^\s*[+-]?\d+\s*$'
+FLOAT_PATTERN = r'(?i)^\s*[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?|inf|infinity)\s*$'
+
+# Values pd.read_csv reads as booleans
+TRUE_VALUES = ['True', 'TRUE', 'true']
+FALSE_VALUES = ['False', 'FALSE', 'false']
+
+# Text columns are Arrow-backed, the strings never become Python objects
+ARROW_STRING_DTYPE = pd.StringDtype('pyarrow')
+
+
+def read_csv_arrow(source):
+    """
+        Reads a CSV file with the multithreaded Arrow CSV reader, text columns stay in Arrow memory.
+
+        Parameters
+        ----------
+        source : str or file-like object
+            The CSV file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The DataFrame, with the numeric and boolean columns pd.read_csv would give (read with
+            data_wrangling.missing_value_options()) and the text columns as Arrow-backed strings (dtype
+            "string") instead of object columns. Missing values are already NaN.
+
+        Notes
+        -------
+        Arrow infers the column types from the first block only and also reads dates and times, unlike
+        pd.read_csv. Every column is therefore read as text and typed afterwards with Arrow compute kernels,
+        the same way pd.read_csv types it: int64 (float64 with missing values), float64, bool, or text.
+        """
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+
+    # The header is read first to read every column as text
+    read_options = pcsv.ReadOptions(use_threads=True)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    columns = pcsv.open_csv(source, read_options=read_options).schema.names
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    convert_options = pcsv.ConvertOptions(
+        column_types={col: pa.string() for col in columns},
+        null_values=sorted(STR_NA_VALUES | set(MISSING_VALUES)),
+        strings_can_be_null=True,
+    )
+    table = pcsv.read_csv(source, read_options=read_options, convert_options=convert_options)
+
+    return pd.DataFrame({col: type_text_column(table.column(col)) for col in columns})
+
+
+def type_text_column(values):
+    """
+        Gives a column read as text the data type pd.read_csv would give it.
+
+        Parameters
+        ----------
+        values : pyarrow.ChunkedArray
+            The text values, null where a value is missing.
+
+        Returns
+        -------
+        pd.Series or np.ndarray
+            The values as int64, float64, bool, object (booleans with missing values) or Arrow-backed strings.
+        """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    null_count = values.null_count
+    non_null_count = len(values) - null_count
+
+    # Nothing but missing values
+    if non_null_count == 0:
+        return np.full(len(values), np.nan)
+
+    def matches_all(pattern):
+        return pc.sum(pc.match_substring_regex(values, pattern)).as_py() == non_null_count
+
+    trimmed = pc.utf8_trim_whitespace(values)
+    if matches_all(INTEGER_PATTERN):
+        trimmed = pc.replace_substring(trimmed, '+', '')
+        for integer_type in (pa.int64(), pa.uint64()):
+            try:
+                integers = pc.cast(trimmed, integer_type)
+            except pa.ArrowInvalid:
+                continue
+            # Beyond int64 with missing values, pd.read_csv keeps the text as it is written, blanks included
+            if integer_type == pa.uint64() and null_count:
+                return pd.Series(pd.arrays.ArrowStringArray(pc.fill_null(values, '')), dtype=ARROW_STRING_DTYPE)
+            # Missing values turn integers into floats, as with pd.read_csv
+            return integers.to_numpy(zero_copy_only=False)
+        # Out of the uint64 range, pd.read_csv keeps such values as text
+        return pd.Series(pd.arrays.ArrowStringArray(values), dtype=ARROW_STRING_DTYPE)
+
+    if matches_all(FLOAT_PATTERN):
+        return pc.cast(trimmed, pa.float64()).to_numpy(zero_copy_only=False)
+
+    is_true = pc.is_in(values, value_set=pa.array(TRUE_VALUES))
+    is_false = pc.is_in(values, value_set=pa.array(FALSE_VALUES))
+    if pc.sum(pc.or_(is_true, is_false)).as_py() == non_null_count:
+        booleans = is_true.to_numpy(zero_copy_only=False)
+        if not null_count:
+            return booleans
+        # Booleans with missing values stay Python objects, as with pd.read_csv
+        return np.where(pc.is_null(values).to_numpy(zero_copy_only=False), np.nan, booleans.astype(object))
+
+    return pd.Series(pd.arrays.ArrowStringArray(values), dtype=ARROW_STRING_DTYPE)
@@ -0,0 +1,114 @@
+"""
+Benchmark of the conversion of wide DataFrames: the converted columns assigned one by one (df[col] = ...) against
+the DataFrame built once (data_wrangling.replace_columns).
+
+Run from the myproject directory:
+    python -m csvhandler.processor.benchmark_wide --columns 100 1000 10000 --rows 1000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from .data_wrangling import data_wrangling, replace_columns
+from .main import infer_and_convert_data_types, infer_column_data_type
+
+
+def telemetry_frame(column_count, row_count, seed=0):
+    """
+        Builds a DataFrame shaped like a telemetry export, as pd.read_csv reads it.
+
+        Parameters
+        ----------
+        column_count : int
+            Number of columns, cycling through counters, measures with gaps, flags, states and free text.
+        row_count : int
+            Number of rows.
+        seed : int, optional
+            Seed of the random values.
+
+        Returns
+        -------
+        pd.DataFrame
+            The DataFrame, its columns int64, float64 or object.
+        """
+    rng = np.random.default_rng(seed)
+    makers = [
+        lambda: rng.integers(0, 200, row_count),
+        lambda: np.where(rng.random(row_count) < 0.2, np.nan, rng.normal(size=row_count)),
+        lambda: rng.choice(np.array(['on', 'off'], dtype=object), row_count),
+        lambda: rng.choice(np.array(['idle', 'busy', 'down'], dtype=object), row_count),
+        lambda: rng.integers(0, 10 ** 6, row_count).astype(str).astype(object),
+    ]
+    return pd.DataFrame({f'sensor_{position}': makers[position % len(makers)]() for position in range(column_count)})
+
+
+def assign_one_by_one(df, converted_cols):
+    """The previous way: every converted column assigned to the wrangled DataFrame."""
+    for col, converted_col in zip(df.columns, converted_cols):
+        if converted_col is not None:
+            df[col] = converted_col
+    return df
+
+
+def build_once(df, converted_cols):
+    """The converted columns gathered and the DataFrame built in one step."""
+    return replace_columns(df, {col: converted_col for col, converted_col in zip(df.columns, converted_cols)
+                                if converted_col is not None})
+
+
+def timed(function, *args):
+    """Runs a function, returns its result and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark(column_count, row_count):
+    """
+        Times the two ways of building the converted DataFrame, and the whole inference.
+
+        Parameters
+        ----------
+        column_count : int
+            Number of columns.
+        row_count : int
+            Number of rows.
+
+        Returns
+        -------
+        dict
+            The seconds taken by the one by one assignment ("assign"), the single build ("build"), the whole
+            infer_and_convert_data_types ("infer"), and the number of blocks of both results.
+        """
+    raw = telemetry_frame(column_count, row_count)
+    wrangled = data_wrangling(raw.copy())
+    converted_cols = [infer_column_data_type(wrangled[col]) for col in wrangled.columns]
+
+    assigned, assign_seconds = timed(assign_one_by_one, wrangled.copy(), converted_cols)
+    built, build_seconds = timed(build_once, wrangled.copy(), converted_cols)
+    if not assigned.equals(built):
+        raise AssertionError('The two ways gave different DataFrames.')
+    _, infer_seconds = timed(infer_and_convert_data_types, raw.copy())
+
+    return {'assign': assign_seconds, 'build': build_seconds, 'infer': infer_seconds,
+            'assign_blocks': assigned._mgr.nblocks, 'build_blocks': built._mgr.nblocks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--columns', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'columns':>8} {'assign (s)':>11} {'build (s)':>10} {'speedup':>8} {'blocks':>13} {'infer (s)':>10}")
+    for column_count in args.columns:
+        result = benchmark(column_count, args.rows)
+        print(f"{column_count:>8} {result['assign']:>11.4f} {result['build']:>10.4f} "
+              f"{result['assign'] / result['build']:>7.1f}x "
+              f"{result['assign_blocks']:>6}/{result['build_blocks']:<6} {result['infer']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+import re
+import string
+from functools import cached_property
+
+import pandas as pd
+from .global_variables import MAX_THRESHOLD, TIME_UNITS, PRESCREEN_SAMPLE_SIZE
+
+# Character classes of the prefix signatures, every character is mapped to the letter of its class
+_CHARACTER_CLASSES = {
+    'digit': string.digits,
+    'exponent': 'eE',
+    'imaginary': 'jJ',
+    'letter': ''.join(ch for ch in string.ascii_letters if ch not in 'eEjJ'),
+    'space': string.whitespace,
+    'sign': '+-',
+    'point': '.',
+    'paren': '()',
+    'separator': ':/,',
+}
+_CLASS_TABLE = str.maketrans({ch: str(code) for code, chars in enumerate(_CHARACTER_CLASSES.values()) for ch in chars})
+_CLASS_NAMES = {str(code): name for code, name in enumerate(_CHARACTER_CLASSES)}
+
+# Words read as numbers by pd.to_numeric and complex(), and as dates by pd.to_datetime
+NUMBER_WORDS = re.compile(r'inf(?:inity)?|nan', re.IGNORECASE)
+DATE_WORDS = {'now', 'today'}
+
+# Converters ruled out by a value whose signature has one of these classes, or none of the required ones
+# (a converter missing here, e.g. bool or category, cannot be ruled out by the first values)
+CONVERTER_RULES = {
+    'int': ({'letter', 'imaginary', 'paren', 'separator', 'other'}, {'digit', 'number word'}),
+    'float': ({'letter', 'imaginary', 'paren', 'separator', 'other'}, {'digit', 'number word'}),
+    'datetime': (set(), {'digit', 'date word'}),
+    'complex': ({'letter', 'separator', 'other'}, {'digit', 'number word', 'imaginary'}),
+}
+
+
+def value_signature(value):
+    """
+        Character classes of a text value (see _CHARACTER_CLASSES), "other" for any other character.
+
+        Parameters
+        ----------
+        value : str
+            The value.
+
+        Returns
+        -------
+        frozenset
+            The classes found in the value, with "number word" if it holds inf, infinity or nan (whose letters
+            are then not counted) and "date word" if it is "now" or "today".
+        """
+    classes = set()
+    if value.strip().lower() in DATE_WORDS:
+        classes.add('date word')
+    without_words = NUMBER_WORDS.sub('', value)
+    if len(without_words) != len(value):
+        classes.add('number word')
+
+    for code in set(without_words.translate(_CLASS_TABLE)):
+        if code in _CLASS_NAMES:
+            classes.add(_CLASS_NAMES[code])
+        # Characters outside the table, non-ASCII blanks and digits are still read as such
+        elif code.isspace():
+            classes.add('space')
+        elif code.isdigit():
+            classes.add('digit')
+        else:
+            classes.add('other')
+    return frozenset(classes)
+
+
+class ColumnProfile:
+    """
+        Summary of a single column that is computed once and shared by every converter in infer_functions.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The column to profile.
+
+        Attributes
+        ----------
+        column : pd.Series
+            The profiled column itself.
+        null_mask : pd.Series
+            Boolean mask, True where the value is null.
+        null_count : int
+            The number of null values in the column.
+        non_null : pd.Series
+            The column without null values (original index kept).
+
+        Notes
+        -------
+        Everything except the null mask is computed lazily on first access and then cached, so a converter
+        that is rejected early never pays for the numeric coercion or the distinct scan.
+        Converters that cannot accept the first PRESCREEN_SAMPLE_SIZE values of a text column, judging by the
+        character classes of these values, are ruled out before any work on the whole column (see ruled_out).
+        The distinct set is bounded: it keeps at most `distinct_limit + 1` values, which is enough to decide
+        both boolean (exactly 2 values) and category (MIN_THRESHOLD..MAX_THRESHOLD values). It is probed block
+        by block and the probe stops at the first block that goes over the limit, a column of IDs is rejected
+        after a few thousand rows.
+        """
+
+    # Enough distinct values to answer "exactly 2" and "inside MIN_THRESHOLD..MAX_THRESHOLD"
+    distinct_limit = max(MAX_THRESHOLD, 2)
+
+    # Rows of the first block of the distinct probe, every next block is twice as big
+    distinct_block_size = 4096
+
+    def __init__(self, column):
+        self.column = column
+        self.null_mask = column.isna()
+        self.null_count = int(self.null_mask.sum())
+        self.non_null = column[~self.null_mask] if self.null_count else column
+
+    @property
+    def size(self):
+        """Number of rows in the column, null values included."""
+        return len(self.column)
+
+    @property
+    def non_null_count(self):
+        """Number of non-null values in the column."""
+        return self.size - self.null_count
+
+    @cached_property
+    def distinct_values(self):
+        """
+        Distinct non-null values in order of first appearance, bounded to `distinct_limit + 1` entries.
+        """
+        return self.distinct_up_to(self.distinct_limit)
+
+    def distinct_up_to(self, limit):
+        """
+        Distinct non-null values in order of first appearance, probed block by block until more than `limit`
+        are found.
+
+        Parameters
+        ----------
+        limit : int
+            The number of distinct values that is enough to know.
+
+        Returns
+        -------
+        np.ndarray or ExtensionArray
+            At most `limit + 1` distinct values, `limit + 1` means "more than the limit".
+        """
+        values = self.non_null
+        # The probe could not stop early, the whole column is scanned at once
+        if limit >= len(values):
+            return pd.unique(values)
+        found = values.iloc[:0]
+        start, block_size = 0, self.distinct_block_size
+        while start < len(values) and len(found) <= limit:
+            # Only the distinct values of the block are merged with the ones found so far
+            block = pd.Series(pd.unique(values.iloc[start:start + block_size]), dtype=values.dtype)
+            found = pd.Series(pd.unique(pd.concat([found, block], ignore_index=True)), dtype=values.dtype)
+            start += block_size
+            block_size *= 2
+        return pd.unique(found)[:limit + 1]
+
+    @property
+    def distinct_count(self):
+        """
+        Number of distinct non-null values, capped at `distinct_limit + 1` (which means "more than the limit").
+        """
+        return len(self.distinct_values)
+
+    @cached_property
+    def numeric(self):
+        """
+        The non-null values coerced to a numeric type, values that cannot be converted become NaN.
+        """
+        return pd.to_numeric(self.non_null, errors='coerce')
+
+    @cached_property
+    def is_numeric(self):
+        """True if every non-null value can be converted to a number."""
+        return not self.numeric.isna().any()
+
+    @cached_property
+    def is_integral(self):
+        """True if every non-null value is a number without a decimal part."""
+        return self.is_numeric and not (self.numeric % 1 != 0).any()
+
+    @cached_property
+    def minimum(self):
+        """Minimum of the numeric values (NaN for an empty column)."""
+        return self.numeric.min()
+
+    @cached_property
+    def maximum(self):
+        """Maximum of the numeric values (NaN for an empty column)."""
+        return self.numeric.max()
+
+    @cached_property
+    def text_length(self):
+        """Total number of characters of the non-null values, for a column of strings."""
+        # Arrow-backed strings have a length kernel, Python strings are faster to measure one by one than with .str
+        if isinstance(self.non_null.dtype, pd.StringDtype):
+            return int(self.non_null.str.len().sum())
+        return sum(map(len, self.non_null.to_numpy()))
+
+    @cached_property
+    def inferred_type(self):
+        """The pandas inferred type of the non-null values, e.g. 'string', 'integer', 'mixed' or 'empty'."""
+        return pd.api.types.infer_dtype(self.non_null, skipna=True)
+
+    @property
+    def is_string(self):
+        """True if every non-null value is a Python string."""
+        return self.inferred_type in ('string', 'empty')
+
+    @cached_property
+    def mentions_time_unit(self):
+        """
+        False if no value contains the name of a unit in TIME_UNITS, which has_time_unit requires.
+        """
+        # Only columns holding text can carry a unit, the .str accessor is not available on the others
+        if self.inferred_type not in ('string', 'mixed', 'mixed-integer'):
+            return False
+
+        # One substring search over all the values, much faster than a regular expression per value
+        values = self.non_null.to_numpy()
+        if self.inferred_type != 'string':
+            values = [value for value in values if isinstance(value, str)]
+        text = '\x00'.join(values)
+        # Non-ASCII letters can match a unit case-insensitively (e.g. "İ" matches "i"), has_time_unit decides
+        if not text.isascii():
+            return True
+        text = text.lower()
+        return any(unit in text for unit in TIME_UNITS)
+
+    @cached_property
+    def has_time_unit(self):
+        """
+        True if at least one value contains a number followed by a unit in TIME_UNITS, e.g. "3 days".
+        """
+        if not self.mentions_time_unit:
+            return False
+
+        # Create a regular expression pattern that includes all the units in the TIME_UNITS
+        time_units_pattern = '|'.join([f"{unit}s?" for unit in TIME_UNITS])
+        return bool(self.non_null.str.contains(fr"\d+\s?(?:{time_units_pattern})", case=False, na=False).any())
+
+    @cached_property
+    def prefix_signatures(self):
+        """
+        Signatures (see value_signature) of the distinct values among the first PRESCREEN_SAMPLE_SIZE non-null
+        values, empty unless every value is a string.
+        """
+        if not self.is_string:
+            return set()
+        return {value_signature(value) for value in set(self.non_null.iloc[:PRESCREEN_SAMPLE_SIZE])}
+
+    @cached_property
+    def ruled_out(self):
+        """
+        Converters that cannot succeed on the whole column because they cannot accept one of its first values,
+        in the order they would be tried (see CONVERTER_RULES).
+        """
+        return tuple(
+            converter for converter, (forbidden, required) in CONVERTER_RULES.items()
+            if any(signature & forbidden or not signature & required for signature in self.prefix_signatures)
+        )
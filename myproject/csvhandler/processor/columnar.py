@@ -0,0 +1,219 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from .data_wrangling import replace_columns
+from .infer_functions import parse_complex
+
+# Schema metadata key listing the columns stored as text because Arrow has no complex type
+COMPLEX_COLUMNS_KEY = b'csvhandler.complex_columns'
+
+# Schema metadata key mapping the columns stored dense because Arrow has no sparse type to their Sparse data type
+SPARSE_COLUMNS_KEY = b'csvhandler.sparse_columns'
+
+
+def frame_to_arrow(df, schema=None):
+    """
+        Converts a processed DataFrame to an Arrow table, keeping the inferred data types.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The processed DataFrame.
+        schema : pyarrow.Schema, optional
+            The schema to convert to (the one of the first chunk when a file is written chunk by chunk).
+
+        Returns
+        -------
+        pyarrow.Table
+            The table, its schema carries the pandas data types (Int8, category, datetime with time zone...).
+       Notes
+       -------
+       Arrow has no complex type, complex columns are stored as text and listed in the schema metadata so
+       arrow_to_frame can restore them. Sparse columns are stored dense and restored the same way. Text columns
+       holding other values than strings are stored as text.
+        """
+    import pyarrow as pa
+
+    complex_columns = []
+    sparse_columns = {}
+    converted = {}
+    for col in df.columns:
+        column = df[col]
+        if isinstance(column.dtype, pd.SparseDtype):
+            sparse_columns[col] = str(column.dtype)
+            column = column.sparse.to_dense()
+        if column.dtype.kind == 'c':
+            complex_columns.append(col)
+            column = text_column(column)
+        elif column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) not in ('string', 'empty'):
+            column = text_column(column)
+        converted[col] = column
+    df = pd.DataFrame(converted, index=df.index)
+
+    if schema is None:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        # A text column without any value must still accept text (e.g. in the next chunk)
+        for index, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(index, field.with_type(pa.string()))
+        metadata = dict(schema.metadata or {})
+        metadata[COMPLEX_COLUMNS_KEY] = json.dumps(complex_columns).encode()
+        metadata[SPARSE_COLUMNS_KEY] = json.dumps(sparse_columns).encode()
+        schema = schema.with_metadata(metadata)
+
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def parquet_table(table):
+    """
+        Converts a table written by frame_to_arrow to the data types a Parquet file can hold.
+
+        Parameters
+        ----------
+        table : pyarrow.Table
+            The table.
+
+        Returns
+        -------
+        pyarrow.Table
+            The table itself, or a copy with its float16 columns widened to float32 (Parquet only has a float16
+            type from pyarrow 15 on). Every value is kept.
+        """
+    import pyarrow as pa
+
+    schema = table.schema
+    for index, field in enumerate(schema):
+        if pa.types.is_float16(field.type):
+            schema = schema.set(index, field.with_type(pa.float32()))
+    return table if schema.equals(table.schema) else table.cast(schema)
+
+
+def arrow_to_frame(table):
+    """
+        Converts an Arrow table written by frame_to_arrow back to a DataFrame with the original data types.
+
+        Parameters
+        ----------
+        table : pyarrow.Table
+            The table.
+
+        Returns
+        -------
+        pd.DataFrame
+            The DataFrame, complex columns parsed back to complex128, sparse columns back to their Sparse data type
+            and missing text as NaN.
+        """
+    df = table.to_pandas()
+    # Arrow gives None for missing text, the rest of the processor expects NaN as read_csv gives it
+    for col in df.columns:
+        if df[col].dtype == object and df[col].isna().any():
+            df[col] = df[col].fillna(np.nan)
+
+    complex_columns = json.loads((table.schema.metadata or {}).get(COMPLEX_COLUMNS_KEY, b'[]'))
+    for col in complex_columns:
+        # Only some of the columns may have been read
+        if col not in df.columns:
+            continue
+        column = df[col]
+        null_mask = column.isna()
+        values = np.full(len(column), complex(np.nan, 0), dtype=np.complex128)
+        values[~null_mask.to_numpy()] = parse_complex(column[~null_mask])[0].to_numpy()
+        df[col] = values
+
+    sparse_columns = json.loads((table.schema.metadata or {}).get(SPARSE_COLUMNS_KEY, b'{}'))
+    return replace_columns(df, {col: df[col].astype(pd.api.types.pandas_dtype(dtype))
+                                for col, dtype in sparse_columns.items() if col in df.columns})
+
+
+def text_column(column):
+    """
+        Converts the values of a column to strings, NaN stays NaN.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The column.
+
+        Returns
+        -------
+        pd.Series
+            The column of strings.
+        """
+    return column.astype(str).where(column.notna(), None)
+
+
+def write_frame(df, path):
+    """
+        Writes a processed DataFrame to a typed columnar file (Arrow IPC file, a.k.a. Feather v2).
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The processed DataFrame.
+        path : str
+            The path of the file.
+       Notes
+       -------
+       The file is not compressed so read_frame can memory-map it
+        """
+    import pyarrow.feather as feather
+
+    feather.write_feather(frame_to_arrow(df), path, compression='uncompressed')
+
+
+def read_frame(path, columns=None):
+    """
+        Reads a file written by write_frame (or write_converted_chunks in 'arrow' format).
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        columns : list, optional
+            Only read these columns.
+
+        Returns
+        -------
+        pd.DataFrame
+            The DataFrame with the data types it was written with, nothing is parsed again.
+       Notes
+       -------
+       The file is memory-mapped, only the columns that are used are read from disk
+        """
+    import pyarrow.feather as feather
+
+    return arrow_to_frame(feather.read_table(path, columns=columns, memory_map=True))
+
+
+def iter_frames(path, batch_rows):
+    """
+        Reads a file written by write_frame batch by batch.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        batch_rows : int
+            Maximum number of rows per batch.
+
+        Yields
+        -------
+        pd.DataFrame
+            The next rows of the file, with the data types it was written with (one empty DataFrame for an
+            empty file).
+       Notes
+       -------
+       The file is memory-mapped, only one batch at a time is converted to pandas
+        """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = feather.read_table(path, memory_map=True)
+
+    # An empty file still has its columns
+    if table.num_rows == 0:
+        yield arrow_to_frame(table)
+    for batch in table.to_batches(max_chunksize=batch_rows):
+        yield arrow_to_frame(pa.Table.from_batches([batch], schema=table.schema))
@@ -1,11 +1,29 @@
+import re
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
 
 from .global_variables import  MISSING_VARIABLE
 from .global_variables import SPECIAL_SYMBOLS
 
+# Every representation of a missing value, on top of the ones pd.read_csv already recognizes
+MISSING_VALUES = ['Not Available', 'N/A', 'null', '-', 'Data', 'NA'] + MISSING_VARIABLE
+
 
-def data_wrangling(df):
+def missing_value_options():
+    """
+    Arguments of pd.read_csv turning every representation of a missing value into NaN while the file is parsed.
+
+    Returns:
+    -------
+    dict
+        The na_values and keep_default_na arguments: MISSING_VALUES on top of the pandas defaults.
+    """
+    return {'na_values': MISSING_VALUES, 'keep_default_na': True}
+
+
+def data_wrangling(df, missing_values_parsed=False, report=None):
     """
     Cleans and formats the given DataFrame by standardizing missing values to NaN,
     removing leading and trailing whitespace from string columns, and eliminating special
@@ -15,6 +33,11 @@ def data_wrangling(df):
     ----------
     df : pd.DataFrame
         The input DataFrame that requires cleaning and formatting.
+    missing_values_parsed : bool, optional
+        The DataFrame was read with missing_value_options(), its missing values are already NaN and the
+        frame is not scanned for them again.
+    report : dict, optional
+        Filled with the number of cells modified by the cleaning, for every text column.
 
     Returns:
     -------
@@ -22,23 +45,139 @@ def data_wrangling(df):
         A cleaned DataFrame with standardized missing values and formatted string columns.
     """
 
-    # Formalize missing values to NaN
-    formalized_data = formalize_missing_values(df)
+    # Formalize missing values to NaN, unless the parser already did
+    formalized_data = df if missing_values_parsed else formalize_missing_values(df)
 
+    # Cleaned columns are gathered and the DataFrame is built once, see replace_columns
+    cleaned_cols = {}
     for col in formalized_data.columns:
-        # Solve the col is not string
-        if df[col].dtype != 'object':
+        # Solve the col is not string (object, or Arrow-backed strings, see arrow_parsing)
+        if df[col].dtype != 'object' and not isinstance(df[col].dtype, pd.StringDtype):
             continue
 
-        # Remove the blank on the two sides
-        formalized_data[col] = formalized_data[col].str.strip()
+        # pd.read_csv gives Python booleans for True/False with missing values, cleaned as the text they were
+        column = formalized_data[col]
+        if pd.api.types.infer_dtype(column, skipna=True) == 'boolean':
+            column = cleaned_cols[col] = column.where(column.isna(), column.astype(str))
+
+        # Remove the blank on the two sides and special symbols but keep "-", "/" date symbols, in one pass
+        cleaned, modified = clean_text_column(column, symbol_pattern(tuple(SPECIAL_SYMBOLS)))
+        if modified:
+            cleaned_cols[col] = cleaned
+        if report is not None:
+            report[col] = modified
+
+    return replace_columns(formalized_data, cleaned_cols)
+
+
+def replace_columns(df, replacements, columns=None):
+    """
+    Replaces columns of a DataFrame, the new DataFrame is built in one step.
+
+    Parameters:
+    ----------
+    df : pd.DataFrame
+        The DataFrame.
+    replacements : dict
+        The new values (pd.Series with the index of df) of the replaced columns, and of the added ones.
+    columns : pd.Index, optional
+        The columns of the new DataFrame in order, the columns of df by default.
+
+    Returns:
+    -------
+    pd.DataFrame
+        The new DataFrame, df itself if nothing is replaced.
+
+    Notes:
+    -------
+    Assigning converted columns one by one (df[col] = ...) splits the block holding the column at every
+    assignment, which gets slower with every column of a wide DataFrame and leaves it fragmented. Here the
+    other columns are kept in their blocks, the new ones are grouped in one block per data type.
+    """
+    columns = df.columns if columns is None else columns
+    if not replacements:
+        return df if columns.equals(df.columns) else df[columns]
+
+    kept = df.drop(columns=list(replacements), errors='ignore')
+    # The values share the index of df, they are not aligned again
+    added = pd.DataFrame({col: values.array for col, values in replacements.items()}, index=df.index)
+    return pd.concat([kept, added], axis=1, copy=False)[columns]
+
+
+@lru_cache(maxsize=None)
+def symbol_pattern(special_symbols):
+    """
+    Compiles the pattern of the characters removed by the cleaning, once per configuration.
+
+    Parameters:
+    ----------
+    special_symbols : tuple
+        The special symbols that are kept (SPECIAL_SYMBOLS).
+
+    Returns:
+    -------
+    re.Pattern
+        Matches any character that is not a letter, a digit, a blank or one of the special symbols.
+    """
+    special_chars_pattern = ''.join([f'\\{char}' for char in special_symbols])
+    return re.compile(rf'[^a-zA-Z0-9\s{special_chars_pattern}]')
+
+
+def clean_text_column(column, pattern):
+    """
+    Strips the blanks on the two sides of every value of a text column and removes the characters matched
+    by the pattern, the same as .str.strip() followed by .str.replace(pattern, '') but in one pass.
+
+    Parameters:
+    ----------
+    column : pd.Series
+        An object column, or Arrow-backed strings.
+    pattern : re.Pattern
+        The characters to remove (see symbol_pattern).
+
+    Returns:
+    -------
+    tuple(pd.Series, int)
+        The cleaned column (the column itself if nothing changed) and the number of cells modified.
+
+    Notes:
+    -------
+    Values made of ASCII letters and digits only, and values without blanks around them nor any character
+    to remove, are left as they are without building a new string. Values that are not strings become NaN.
+    """
+    # Arrow-backed strings are cleaned by the Arrow compute kernels
+    if isinstance(column.dtype, pd.StringDtype):
+        cleaned = column.str.strip().str.replace(pattern.pattern, '', regex=True)
+        return cleaned, int((cleaned != column).sum())
+
+    values = column.to_numpy(dtype=object)
+    cleaned = None
+    modified = 0
+    search = pattern.search
+    for position, value in enumerate(values):
+        if value.__class__ is str:
+            if value.isascii() and value.isalnum():
+                continue
+            stripped = value.strip()
+            if stripped is value and search(value) is None:
+                continue
+            new_value = pattern.sub('', stripped)
+            if new_value == value:
+                continue
+        elif pd.isna(value):
+            continue
+        else:
+            new_value = np.nan
 
-        # Remove special symbols but keep "-", "/" date symbols
-        special_chars_pattern = ''.join([f'\\{char}' for char in SPECIAL_SYMBOLS])
-        regex_pattern = rf'[^a-zA-Z0-9\s{special_chars_pattern}]'
-        formalized_data[col] = formalized_data[col].str.replace(regex_pattern, '', regex=True)
+        # The values are only copied once the first one changes
+        if cleaned is None:
+            cleaned = values.copy()
+        cleaned[position] = new_value
+        modified += 1
 
-    return formalized_data
+    if cleaned is None:
+        return column, 0
+    return pd.Series(cleaned, index=column.index, name=column.name), modified
 
 def formalize_missing_values(df):
     """
@@ -56,7 +195,7 @@ def formalize_missing_values(df):
     """
 
     # Replace all possible missing data to NaN
-    missing_values = ['Not Available', 'N/A', 'null', '-', 'Data', 'NA', None] + MISSING_VARIABLE
+    missing_values = MISSING_VALUES + [None]
     df.replace(missing_values, np.nan, inplace=True)
     return df
 
@@ -1,4 +1,5 @@
 import pandas as pd
+from csvhandler.processor.data_wrangling import replace_columns
 from csvhandler.processor.infer_functions import *
 
 def forced_to_bool(df, type_map):
@@ -18,41 +19,53 @@ def forced_to_bool(df, type_map):
                       wherever applicable.
     """
 
-    # Iterate through the type_map to process and convert DataFrame columns
+    # Iterate through the type_map to process and convert DataFrame columns, the converted columns are gathered
+    # and the DataFrame is built once at the end (see replace_columns)
+    converted_cols = {}
     for column, dtype in type_map.items():
         try:
             # Check if the column exists in the DataFrame
             if column in df.columns:
-                # Handle integer conversions
-                if dtype in ["Int64", "Int32", "Int16", "Int8"]:
-                    df[column] = df[column].astype(int)
+                # Handle integer conversions, to the requested width (a value out of its range raises TypeError)
+                if dtype in ["Int64", "Int32", "Int16", "Int8", "UInt64", "UInt32", "UInt16", "UInt8"]:
+                    converted_cols[column] = df[column].astype(int).astype(dtype)
                 # Handle float conversions
-                elif dtype in ["float64", "float32"]:
-                    df[column] = df[column].astype(float)
+                elif dtype in ["float64", "float32", "float16"]:
+                    converted_cols[column] = df[column].astype(float).astype(dtype)
                 # Handle datetime conversions
                 elif dtype in ["datetime64[ns]", "datetime64[ns, UTC]"]:
-                    df[column] = pd.to_datetime(df[column], errors='raise')
-                # Handle boolean conversions
+                    converted_cols[column] = pd.to_datetime(df[column], errors='raise')
+                # Handle boolean conversions, text is read like the boolean converter reads it (e.g. "False" is False)
+                # and missing values stay missing
                 elif dtype == "bool":
-                    df[column] = df[column].astype(bool)
+                    if df[column].dtype == object or isinstance(df[column].dtype, pd.StringDtype):
+                        unique_values = list(df[column].dropna().unique())
+                        converted_cols[column] = to_boolean(df[column], true_values(unique_values))
+                    else:
+                        converted_cols[column] = df[column].astype(bool)
                 # Handle category type conversions
                 elif dtype == "category":
-                    df[column] = df[column].astype('category')
+                    converted_cols[column] = df[column].astype('category')
                 # Handle timedelta conversions
                 elif dtype == "timedelta64[ns]":
-                    df[column] = pd.to_timedelta(df[column], errors='raise')
-                    print(f"Column {column} converted to {df[column].dtype}.")
+                    converted_cols[column] = pd.to_timedelta(df[column], errors='raise')
+                    print(f"Column {column} converted to {converted_cols[column].dtype}.")
                 # Handle complex number conversions
                 elif dtype == "complex128":
-                    df[column] = df[column].astype(complex)
-                # Handle object (string) conversions
+                    converted_cols[column] = df[column].astype(complex)
+                # Handle object (string) conversions, missing values stay missing
                 elif dtype == "object":
-                    df[column] = df[column].astype(str)
+                    converted_cols[column] = df[column].astype(str).mask(df[column].isna())
+                # Handle sparse conversions (e.g. "Sparse[float32, nan]"), missing values stay missing
+                elif dtype.startswith("Sparse["):
+                    sparse_dtype = pd.api.types.pandas_dtype(dtype)
+                    values = df[column] if sparse_dtype.subtype == object else df[column].astype(float)
+                    converted_cols[column] = values.astype(sparse_dtype)
                 # Additional data types can be added here as needed
         except (ValueError, TypeError):
             # Log an error message if conversion fails and skip the column
             print(f"Column {column} could not be converted. Keeping its original type.")
 
-    return df
+    return replace_columns(df, converted_cols)
 
 
@@ -33,8 +33,21 @@ SPECIAL_SYMBOLS = [ '-', '/', '@', '.', '+', ':', ',', ' ']
 # "%H:%M:%S": 14:30:00 (time only)
 DATA_FORMAT = ""
 
+# Number of values used to guess the datetime format before the whole column is parsed with it
+DATE_SAMPLE_SIZE = 100
+
 # A representation of a Boolean value
-BOOLEAN_SET = {"T", "F"}
+BOOLEAN_SET = {"T", "F", "True", "False"}
+# The representations in BOOLEAN_SET standing for True, the others stand for False
+TRUE_VALUES = {"T", "True"}
+
+# Number of values at the start of a text column whose characters are checked before any converter runs,
+# a converter that cannot accept one of them is not tried on the whole column
+PRESCREEN_SAMPLE_SIZE = 100
+
+# Integer data types from the narrowest to the widest, a column gets the first one holding its min and max
+# (the signed type comes first when both have the same width, unsigned types only save memory when wider)
+INTEGER_DTYPES = ['Int8', 'UInt8', 'Int16', 'UInt16', 'Int32', 'UInt32', 'Int64', 'UInt64']
 
 # Min threshold and Max threshold for category, the number of unique values
 # that are not null in what range will this column will be recognized as category (Equal included)
@@ -42,4 +55,43 @@ MIN_THRESHOLD = 3
 MAX_THRESHOLD = 4
 
 # global_variables.py
-TIME_UNITS = ["days", "hours", "minutes", "seconds", "weeks"]
\ No newline at end of file
+TIME_UNITS = ["days", "hours", "minutes", "seconds", "weeks"]
+
+# Parallel type inference: spread the columns over a process pool (off by default)
+# Only DataFrames with at least PARALLEL_MIN_CELLS cells (rows * columns) are processed in parallel,
+# smaller uploads stay serial because the pool overhead would be bigger than the gain
+PARALLEL_INFERENCE = False
+PARALLEL_MIN_CELLS = 2_000_000
+# Number of worker processes, None means one per CPU
+PARALLEL_WORKERS = None
+
+# Sampled type inference: the data type of a column is chosen on SAMPLE_SIZE rows drawn evenly from SAMPLE_STRATA
+# slices of the column, then verified with one pass over the whole column (off by default)
+# Only DataFrames with at least SAMPLING_MIN_ROWS rows are sampled
+SAMPLED_INFERENCE = False
+SAMPLE_SIZE = 10_000
+SAMPLE_STRATA = 10
+SAMPLING_MIN_ROWS = 100_000
+
+# Distinct values of a streamed column beyond the exact ones are counted with a HyperLogLog sketch of
+# 2 ** DISTINCT_SKETCH_PRECISION one-byte registers (relative error about 1.6% with 12)
+DISTINCT_SKETCH_PRECISION = 12
+
+# Cost-based representation: a column kept as text is stored as Python strings, categorical codes or Arrow strings,
+# whichever is estimated to take the least memory (off by default)
+COST_BASED_REPRESENTATION = False
+
+# Sparse columns: a column with more than SPARSE_NULL_RATIO of missing values is stored as a pandas Sparse column,
+# only its other values are kept in memory (off by default)
+SPARSE_INFERENCE = False
+SPARSE_NULL_RATIO = 0.95
+
+# Streaming type inference: big CSV files are read STREAMING_CHUNK_SIZE rows at a time,
+# uploads of at least STREAMING_MIN_BYTES bytes are always streamed
+STREAMING_CHUNK_SIZE = 100_000
+STREAMING_MIN_BYTES = 512 * 1024 * 1024
+
+# Arrow CSV parsing: read uploads with the multithreaded Arrow CSV reader and keep the text columns as
+# Arrow-backed strings instead of Python objects (off by default, a request can also ask for it with engine=arrow)
+# Streamed uploads are always read with the pandas C parser
+ARROW_PARSING = False
@@ -1,13 +1,23 @@
 import copy
+import re
+import warnings
 
 import numpy as np
 import pandas as pd
-from .global_variables import DATA_FORMAT, MAX_THRESHOLD, MIN_THRESHOLD, BOOLEAN_SET, TIME_UNITS
+from .column_profile import ColumnProfile
+from .global_variables import (DATA_FORMAT, MAX_THRESHOLD, MIN_THRESHOLD, BOOLEAN_SET, TRUE_VALUES, DATE_SAMPLE_SIZE,
+                               INTEGER_DTYPES)
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    # pandas < 2.2 only exposes it from the parsing module
+    from pandas._libs.tslibs.parsing import guess_datetime_format
 
 
 # from global_variables import BOOLEAN_SET
 
-def convert_column_if_date_format(column):
+def convert_column_if_date_format(column, profile=None):
     """
        Converts a column to datetime format if all non-null values can be successfully parsed as dates.
 
@@ -15,6 +25,8 @@ def convert_column_if_date_format(column):
        ----------
        column : pd.Series
            The column to check and potentially convert to datetime.
+       profile : ColumnProfile, optional
+           The shared profile of the column, computed here if not given.
 
        Returns
        -------
@@ -26,14 +38,25 @@ def convert_column_if_date_format(column):
        Try to convert to datetime
        Checks if all value in the column can be successfully converted to date format, and converts the column
        NaN will be converted to NaT
+       The check parses the whole column at once (see detect_dates), not one value at a time
        """
 
-    # Check if all value (skipping NaN) can be converted to date format
-    has_date = column.apply(lambda x: pd.notnull(x) and pd.to_datetime(x, errors='coerce') is not pd.NaT).all()
+    if profile is None:
+        profile = ColumnProfile(column)
+
+    # A NaN is never a date, so a column with any null value cannot be converted
+    if profile.null_count:
+        return column
+
+    # Check if all value can be converted to date format
+    has_date, parsed = detect_dates(column)
 
     if has_date:
         # If there is no required format, convert by default
         if DATA_FORMAT == "":
+            # The detection already parsed the column the same way the default conversion would
+            if parsed is not None:
+                return parsed
             column = pd.to_datetime(column, errors='coerce')
             return column
         else:
@@ -50,14 +73,125 @@ def convert_column_if_date_format(column):
     return column
 
 
-def convert_to_int_optimal(column):
+def detect_dates(column):
     """
-        Converts a column to the optimal integer type (Int8, Int16, Int32, or Int64) to save memory if possible.
+        Checks if every value in a column without NaN can be parsed as a date, using vectorized parsing.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The column to check, it must not contain NaN.
+
+        Returns
+        -------
+        tuple(bool, pd.Series or None)
+            Whether all values are dates, and the parsed column if it was parsed with the format guessed from
+            its first value (the same result pd.to_datetime gives without a format), None otherwise.
+       Notes
+       -------
+       A format is guessed from a sample of the column so the bulk parse can use an explicit `format=`.
+       The values it cannot parse are parsed again one by one by pandas (format='mixed'), which accepts
+       exactly what a per-value pd.to_datetime call accepts.
+        """
+    with warnings.catch_warnings():
+        # Guessing formats on ambiguous values (e.g. day first) warns, it is not meaningful here
+        warnings.simplefilter('ignore')
+
+        sample = column.iloc[:DATE_SAMPLE_SIZE]
+        date_format = guess_date_format(sample)
+
+        # Every value must be a date, one value of the sample that is not rejects the column right away
+        if date_format is None or not pd.to_datetime(sample, format=date_format, errors='coerce').notna().all():
+            if not parse_dates_mixed(sample).notna().all():
+                return False, None
+
+        if date_format is None:
+            remaining = column
+            parsed = None
+        else:
+            parsed = pd.to_datetime(column, format=date_format, errors='coerce')
+            failed = parsed.isna()
+            if not failed.any():
+                # Only reusable as the conversion if the format is the one pandas would guess itself
+                if date_format != guess_datetime_format(str(column.iloc[0])):
+                    parsed = None
+                return True, parsed
+            remaining = column[failed]
+            parsed = None
+
+        remaining_parsed = parse_dates_mixed(remaining)
+
+    return not remaining_parsed.isna().any(), parsed
+
+
+def parse_dates_mixed(values):
+    """
+        Parses values that may each have their own date format, values that are not dates become NaT.
+
+        Parameters
+        ----------
+        values : pd.Series
+            The values to parse.
+
+        Returns
+        -------
+        pd.Series
+            The parsed values.
+        """
+    try:
+        return pd.to_datetime(values, format='mixed', errors='coerce')
+    except (ValueError, TypeError, OverflowError):
+        # Mixed values pandas refuses to parse together, parse them one by one
+        return values.apply(lambda x: pd.to_datetime(x, errors='coerce'))
+
+
+def guess_date_format(sample):
+    """
+        Guesses the date format that parses the most values of a sample.
+
+        Parameters
+        ----------
+        sample : pd.Series
+            A few values of the column, without NaN.
+
+        Returns
+        -------
+        str or None
+            The best strftime format, or None if no format can be guessed.
+       Notes
+       -------
+       The format of the first value is tried first, then the formats of a few other distinct values,
+       the first one that parses the whole sample wins
+        """
+    best_format, best_count = None, 0
+    candidates = []
+    for value in pd.unique(sample.astype(str)):
+        date_format = guess_datetime_format(value)
+        if date_format is not None and date_format not in candidates:
+            candidates.append(date_format)
+        if len(candidates) >= 5:
+            break
+
+    for date_format in candidates:
+        parsed_count = pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum()
+        if parsed_count == len(sample):
+            return date_format
+        if parsed_count > best_count:
+            best_format, best_count = date_format, parsed_count
+
+    return best_format
+
+
+def convert_to_int_optimal(column, profile=None):
+    """
+        Converts a column to the optimal integer type (Int8 to Int64, UInt8 to UInt64) to save memory if possible.
 
         Parameters
         ----------
         column : pd.Series
             The column to check and potentially convert to an integer type.
+        profile : ColumnProfile, optional
+            The shared profile of the column, computed here if not given.
 
         Returns
         -------
@@ -69,44 +203,59 @@ def convert_to_int_optimal(column):
        Determines and converts the column to the optimal int type
        NaN will be converted to <NA> or ""
        Save space to the maximum extent possible while retaining complete information
+       Non-negative columns can use an unsigned type, e.g. UInt8 for values up to 255 instead of Int16
         """
 
-    # Delete NaN
-    temp_col_no_NaN = column.dropna()
-
-    # Tried to convert the column to a numeric type, incorrectly converted to NaN
-    converted_col_no_NaN = pd.to_numeric(temp_col_no_NaN, errors='coerce')
+    if profile is None:
+        profile = ColumnProfile(column)
 
     # Check if there is a NaN in the column (non-integer or cannot be converted)
-    if converted_col_no_NaN.isna().any():
+    # or if the decimal part is included
+    if not profile.is_integral:
         return column  # Returns the original column because it is not a pure integer column
 
-    # Check if the decimal part is included
-    if (converted_col_no_NaN % 1 != 0).any():
-        return column  # Returns the original column, which cannot be an int because it contains decimals
+    # Min and max are computed only once and pick the width from the whole lattice
+    # (a column without any value is Int64)
+    int_type = optimal_int_dtype(profile.minimum, profile.maximum) if profile.non_null_count else 'Int64'
+    if int_type is None:
+        return column  # Out of the uint64 range
 
-    # Check int8 range
-    int8_max = np.iinfo(np.int8).max
-    int8_min = np.iinfo(np.int8).min
+    # Non-null values converted to a numeric type
+    return profile.numeric.astype(int_type).reindex_like(column)
 
-    if (converted_col_no_NaN.max() <= int8_max) and (converted_col_no_NaN.min() >= int8_min):
-        return converted_col_no_NaN.astype('Int8').reindex_like(column)  # Convert to int8
 
-    # Check int16 range
-    int16_max = np.iinfo(np.int16).max
-    int16_min = np.iinfo(np.int16).min
+def optimal_int_dtype(minimum, maximum):
+    """
+        Returns the narrowest integer type holding every value between a minimum and a maximum.
 
-    if (converted_col_no_NaN.max() <= int16_max) and (converted_col_no_NaN.min() >= int16_min):
-        return converted_col_no_NaN.astype('Int16').reindex_like(column)  # Convert to int16
+        Parameters
+        ----------
+        minimum : int or float
+            The minimum of the column.
+        maximum : int or float
+            The maximum of the column.
 
-    # Check int32 range
-    int32_max = np.iinfo(np.int32).max
-    int32_min = np.iinfo(np.int32).min
+        Returns
+        -------
+        str or None
+            The first type of INTEGER_DTYPES whose range covers both, e.g. 'Int8', 'UInt8' or 'Int16',
+            None if the values do not fit in any of them.
 
-    if (converted_col_no_NaN.max() <= int32_max) and (converted_col_no_NaN.min() >= int32_min):
-        return converted_col_no_NaN.astype('Int32').reindex_like(column)  # Convert to int32
-    else:
-        return converted_col_no_NaN.astype('Int64').reindex_like(column)  # Convert to int64
+        Notes
+       -------
+       Floats beyond 2 ** 53 are not converted, they may not be the integers of the file
+       (e.g. a column of big integers with a missing value, read as float64)
+        """
+    if any(isinstance(value, (float, np.floating)) and abs(value) > 2 ** 53 for value in (minimum, maximum)):
+        return None
+
+    # Compared as Python integers, numpy compares uint64 and int64 values as floats
+    minimum, maximum = int(minimum), int(maximum)
+    for int_type in INTEGER_DTYPES:
+        info = np.iinfo(int_type.lower())
+        if minimum >= info.min and maximum <= info.max:
+            return int_type
+    return None
 
 
 
@@ -117,14 +266,16 @@ Keep a maximum of six decimal places
 """
 #
 #
-def convert_to_float_optimal(column):
+def convert_to_float_optimal(column, profile=None):
     """
-       Converts a column to the optimal float type (float32 or float64) to save memory if possible.
+       Converts a column to the optimal float type (float16, float32 or float64) to save memory if possible.
 
        Parameters
        ----------
        column : pd.Series
            The column to check and potentially convert to a float type.
+       profile : ColumnProfile, optional
+           The shared profile of the column, computed here if not given.
 
        Returns
        -------
@@ -136,26 +287,72 @@ def convert_to_float_optimal(column):
        Save space to the maximum extent possible while retaining complete information
        Determine and convert the column to the optimal float type
        Keep a maximum of six decimal places
+       float16 is only used if every value survives the round trip exactly (e.g. 0.5 or 12.25, not 0.1)
        """
-    # Tried to convert the column to a numeric type, incorrectly converted to NaN
-    converted_col = pd.to_numeric(column, errors='coerce')
-
-    # If all non-null values in the column are numeric types, proceed with the conversion
-    if converted_col.notna().all():
-        # Check if it's suitable to convert to float32
-        float32_max = np.finfo(np.float32).max
-        float32_min = np.finfo(np.float32).min
-
-        if (converted_col.max() <= float32_max) and (converted_col.min() >= float32_min):
-            return converted_col.astype('float32')  # Convert to float32
-        else:
-            return converted_col.astype('float64')  # Convert to float64
+    if profile is None:
+        profile = ColumnProfile(column)
+
+    # If all values in the column are numeric types (no NaN either), proceed with the conversion
+    if not profile.null_count and profile.is_numeric:
+        # Without NaN the numeric values keep the full index of the column
+        converted_col = profile.numeric
+        float_type = optimal_float_dtype(profile.minimum, profile.maximum, is_exact_float16(converted_col))
+        return converted_col.astype(float_type)
     else:
         # Otherwise, the original column is returned
         return column
 
 
-def convert_to_boolean(column):
+def optimal_float_dtype(minimum, maximum, exact_float16):
+    """
+       Returns the narrowest float type for numeric values.
+
+       Parameters
+       ----------
+       minimum : float
+           The minimum of the values.
+       maximum : float
+           The maximum of the values.
+       exact_float16 : bool
+           True if every value converts to float16 and back unchanged (see is_exact_float16).
+
+       Returns
+       -------
+       str
+           'float16' if the values are exact as float16 and within its range, 'float32' if they are within the
+           float32 range, 'float64' otherwise.
+       """
+    float16 = np.finfo(np.float16)
+    if exact_float16 and minimum >= float16.min and maximum <= float16.max:
+        return 'float16'
+
+    float32 = np.finfo(np.float32)
+    if minimum >= float32.min and maximum <= float32.max:
+        return 'float32'
+    return 'float64'
+
+
+def is_exact_float16(values):
+    """
+       Checks that numeric values are stored exactly as float16.
+
+       Parameters
+       ----------
+       values : pd.Series
+           The numeric values, without NaN.
+
+       Returns
+       -------
+       bool
+           True if converting every value to float16 and back gives the same value (values out of the float16
+           range never do).
+       """
+    values = values.to_numpy(dtype=np.float64)
+    with np.errstate(over='ignore'):
+        return bool(np.array_equal(values.astype(np.float16).astype(np.float64), values))
+
+
+def convert_to_boolean(column, profile=None):
     """
        Converts a column to boolean type if it contains only two unique non-null values.
 
@@ -163,6 +360,8 @@ def convert_to_boolean(column):
        ----------
        column : pd.Series
            The column to check and potentially convert to boolean.
+       profile : ColumnProfile, optional
+           The shared profile of the column, computed here if not given.
 
        Returns
        -------
@@ -171,28 +370,75 @@ def convert_to_boolean(column):
        Notes
        -------
        Determine if a column is a Boolean or has only two non-null values
-       The boolean values can be clarified in global_variables.BOOLEAN_SET
+       The boolean values can be clarified in global_variables.BOOLEAN_SET and TRUE_VALUES
+       Missing values stay missing, the column is then of the nullable "boolean" type
        """
 
-    # Unique value after removing NaN and empty value
-    unique_values = column.dropna().unique()
+    if profile is None:
+        profile = ColumnProfile(column)
 
-    # Determines whether it is a Boolean type or has only two non-null values
-    boolean_set = {True, False, 0, 1}.union(BOOLEAN_SET)
-    if column.dtype == 'bool' or (len(unique_values) == 2 and set(unique_values).issubset(boolean_set)):
+    # Unique value after removing NaN and empty value (bounded, enough to know whether there are exactly two)
+    unique_values = profile.distinct_values
+
+    if column.dtype == 'bool':
         # Convert to a Boolean type directly
         return column.astype(bool)
     elif len(unique_values) == 2:
-        # Map one of the two unique values to 1 and the other to 0
-        value_map = {unique_values[0]: 0, unique_values[1]: 1}
-        converted_column = column.map(value_map)
-        # Convert the mapped column to boolean
-        return converted_column.astype(bool)
+        # True, 1, "T", ... become True and False, 0, "F", ... False, otherwise the second value becomes True
+        return to_boolean(column, true_values(unique_values), profile.null_mask)
     else:
         return column
 
 
-def convert_to_categorical(column):
+def true_values(unique_values):
+    """
+       Returns which of the two unique values of a boolean column stand for True.
+
+       Parameters
+       ----------
+       unique_values : list
+           The unique non-null values, in order of first appearance (two for an inferred boolean column).
+
+       Returns
+       -------
+       list
+           The values in BOOLEAN_SET (or True and 1) standing for True if every value is a boolean representation,
+           the second value otherwise (none if there is only one).
+       """
+    boolean_set = {True, False, 0, 1}.union(BOOLEAN_SET)
+    if set(unique_values).issubset(boolean_set):
+        return [value for value in unique_values if value is True or value == 1 or value in TRUE_VALUES]
+    return unique_values[1:2]
+
+
+def to_boolean(column, true_values, null_mask=None):
+    """
+       Converts a column to boolean type, missing values stay missing.
+
+       Parameters
+       ----------
+       column : pd.Series
+           The column to convert.
+       true_values : list
+           The values becoming True, every other non-null value becomes False.
+       null_mask : pd.Series, optional
+           The missing values of the column, computed here if not given.
+
+       Returns
+       -------
+       pd.Series
+           The column as bool, or as the nullable "boolean" type if it has missing values.
+       """
+    if null_mask is None:
+        null_mask = column.isna()
+    converted_column = column.isin(true_values)
+    if null_mask.any():
+        # Like NaN in an integer column becomes <NA> in the nullable integer types
+        converted_column = converted_column.astype('boolean').mask(null_mask)
+    return converted_column
+
+
+def convert_to_categorical(column, profile=None):
     """
         Converts a column to categorical type if the number of unique non-null values falls within a specified range.
 
@@ -200,6 +446,8 @@ def convert_to_categorical(column):
         ----------
         column : pd.Series
             The column to check and potentially convert to categorical.
+        profile : ColumnProfile, optional
+            The shared profile of the column, computed here if not given.
 
         Returns
         -------
@@ -211,8 +459,11 @@ def convert_to_categorical(column):
         """
 
 
-    # Gets the number of unique values in the column that are not null
-    unique_count = column.nunique(dropna=True)
+    if profile is None:
+        profile = ColumnProfile(column)
+
+    # Gets the number of unique values in the column that are not null (capped just above MAX_THRESHOLD)
+    unique_count = profile.distinct_count
 
     # Determine whether the number of unique values is below the max threshold and bigger than the min threshold
     if MAX_THRESHOLD >= unique_count >= MIN_THRESHOLD:
@@ -220,7 +471,7 @@ def convert_to_categorical(column):
     return column  # Or return the original column
 
 
-def convert_to_complex(column):
+def convert_to_complex(column, profile=None):
     """
         Converts a column to complex type if all non-null values are parsable as complex numbers and not of type int or float.
 
@@ -228,6 +479,8 @@ def convert_to_complex(column):
         ----------
         column : pd.Series
             The column to check and potentially convert to complex type.
+        profile : ColumnProfile, optional
+            The shared profile of the column, computed here if not given.
 
         Returns
         -------
@@ -238,46 +491,75 @@ def convert_to_complex(column):
        Determine if the column is of type complex and convert it
         """
 
-    # Check that each non-empty element in the column can be resolved to a complex type and is not of type int or float
-    is_complex = column.dropna().apply(
-        lambda x: isinstance(x, str) and try_convert_to_complex(x)
-    ).all()
+    if profile is None:
+        profile = ColumnProfile(column)
 
-    if is_complex:
-        # If all non-null values can resolve to complex, convert to the complex data type
-        return column.apply(lambda x: complex(x) if pd.notnull(x) else x)
+    # Only strings can be complex, int or float values are rejected without looking at each element
+    if not profile.is_string:
+        return column
+
+    # Parse all non-empty elements in one vectorized pass, unmatched elements are not complex numbers
+    parsed, matched = parse_complex(profile.non_null)
+
+    if matched.all():
+        # If all non-null values can resolve to complex, build the complex column directly, NaN stays NaN
+        values = np.full(len(column), complex(np.nan, 0), dtype=np.complex128)
+        values[~profile.null_mask.to_numpy()] = parsed.to_numpy()
+        return pd.Series(values, index=column.index, name=column.name)
     else:
         # Otherwise, return to the original column
         return column
 
 
-def try_convert_to_complex(x):
+# A number the way Python's complex() reads it: digits with optional "_" separators, a fraction, an exponent,
+# or inf/infinity/nan
+_DIGITS = r'\d(?:_?\d)*'
+_NUMBER = rf'(?:(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?|inf(?:inity)?|nan)'
+
+# Groups: opening parenthesis, real and imaginary parts of "a+bj", real part alone, imaginary part alone
+COMPLEX_PATTERN = re.compile(
+    rf'^\s*(\()?\s*(?:([+-]?{_NUMBER})([+-](?:{_NUMBER})?)[jJ]|([+-]?{_NUMBER})|([+-]?(?:{_NUMBER})?)[jJ])\s*(?(1)\))\s*$',
+    re.IGNORECASE)
+
+
+def parse_complex(values):
     """
-        Checks if a given string can be converted to a complex number.
+        Parses string values as complex numbers in one vectorized pass.
 
         Parameters
         ----------
-        x : str
-            The string to check.
+        values : pd.Series
+            The string values to parse, without NaN.
 
         Returns
         -------
-        bool
-            True if the string can be converted to a complex number, False otherwise.
+        tuple(pd.Series, pd.Series)
+            The parsed complex128 values (NaN where a value is not a complex number) and a boolean mask
+            of the values that are complex numbers.
        Notes
        -------
-       Define helper functions to attempt transformations
+       Accepts exactly the strings Python's complex() accepts, e.g. "1+2j", "(1.5-2j)", "3", "-j" or "1e3J",
+       without calling complex() and without handling an exception per element
         """
-    try:
-        # Try converting the string to a complex type
-        complex(x)
-        return True
-    except ValueError:
-        # If the conversion fails, return False
-        return False
+    parts = values.str.extract(COMPLEX_PATTERN)
+    matched = parts.iloc[:, 1:].notna().any(axis=1)
+
+    # Real part from "a+bj" or alone, 0 if only the imaginary part is given
+    real = parts[1].fillna(parts[3]).where(matched).fillna('0').astype('float64')
 
+    # Imaginary part from "a+bj" or alone, 0 if only the real part is given, "j", "+j" and "-j" mean 1
+    imag = parts[2].fillna(parts[4]).where(matched).fillna('0')
+    imag = imag.where(~imag.isin(['', '+', '-']), imag + '1').astype('float64')
 
-def convert_to_timedelta(column):
+    # Fill both halves directly, arithmetic like real + 1j * imag would lose the sign of a zero imaginary part
+    parsed_values = np.empty(len(values), dtype=np.complex128)
+    parsed_values.real = real.to_numpy()
+    parsed_values.imag = imag.to_numpy()
+    parsed = pd.Series(parsed_values, index=values.index)
+    return parsed.where(matched, complex(np.nan, np.nan)), matched
+
+
+def convert_to_timedelta(column, profile=None):
     """
         Converts a column to timedelta type if any value in the column can be successfully parsed as timedelta.
 
@@ -285,6 +567,8 @@ def convert_to_timedelta(column):
         ----------
         column : pd.Series
             The column to check and potentially convert to timedelta type.
+        profile : ColumnProfile, optional
+            The shared profile of the column, computed here if not given.
 
         Returns
         -------
@@ -295,18 +579,17 @@ def convert_to_timedelta(column):
        NaN will be converted to NaT
        Must be put at the last, because it will convert int or float to timedelta
         """
-    # Create a regular expression pattern that includes all the units in the TIME_UNITS
-    time_units_pattern = '|'.join([f"{unit}s?" for unit in TIME_UNITS])
+    if profile is None:
+        profile = ColumnProfile(column)
 
     # Check if contains 'days', 'hours', 'minutes' time units
-    if column.str.contains(fr"\d+\s?(?:{time_units_pattern})", case=False, na=False).any():
-        # Check if at least one value can be successfully converted to timedelta
-        has_timedelta = column.apply(
-            lambda x: pd.notnull(x) and pd.to_timedelta(x, errors='coerce') is not pd.NaT).any()
-
-        if has_timedelta:
-            # Convert the entire column to the timedelta type, and the non-convertible value becomes NaT
-            column = pd.to_timedelta(column, errors='coerce')
+    if profile.has_time_unit:
+        # Convert the entire column to the timedelta type in one call, and the non-convertible value becomes NaT
+        converted_column = pd.to_timedelta(column, errors='coerce')
+
+        # Check if at least one value was successfully converted to timedelta
+        if converted_column.notna().any():
+            column = converted_column
 
     # Returns the original column (if it doesn't contain time units or can't be converted to timedelta type)
     return column
\ No newline at end of file
@@ -1,25 +1,90 @@
 import pandas as pd
 
-from .data_wrangling import data_wrangling
+from .column_profile import ColumnProfile
+from .data_wrangling import data_wrangling, replace_columns
 from .infer_functions import convert_column_if_date_format, convert_to_boolean, convert_to_categorical, \
     convert_to_complex
 from .infer_functions import convert_to_int_optimal
 from .infer_functions import convert_to_float_optimal
 from .infer_functions import convert_to_timedelta
+from .global_variables import PARALLEL_INFERENCE, PARALLEL_MIN_CELLS, SAMPLED_INFERENCE, SAMPLING_MIN_ROWS, \
+    COST_BASED_REPRESENTATION, MIN_THRESHOLD, MAX_THRESHOLD, SPARSE_INFERENCE
+from .parallel import infer_columns_parallel
+from .registry import ConverterRegistry
+from .representation import choose_representation, sparse_column
+from .sampling import stratified_sample, converter_of, count_counterexamples, count_unseen_values
 
-def infer_and_convert_data_types(df):
+# The converters of infer_column_data_type. Each one comes after the converters that can accept the same columns
+# (e.g. a column of years is int, datetime and maybe category), the others are ordered by their hit rate per cost.
+# Category, complex and timedelta never accept the same column: complex and timedelta leave the columns with
+# MIN_THRESHOLD..MAX_THRESHOLD distinct values to category, and timedelta needs a value with a time unit, which
+# cannot be parsed as a complex number.
+CONVERTERS = ConverterRegistry()
+CONVERTERS.register('bool', convert_to_boolean)
+CONVERTERS.register('int', convert_to_int_optimal, guard=lambda profile: 'int' not in profile.ruled_out,
+                    cost=2, after=('bool',))
+CONVERTERS.register('float', convert_to_float_optimal,
+                    guard=lambda profile: not profile.null_count and 'float' not in profile.ruled_out,
+                    cost=2, after=('int',))
+CONVERTERS.register('datetime', convert_column_if_date_format,
+                    guard=lambda profile: not profile.null_count and 'datetime' not in profile.ruled_out,
+                    cost=8, after=('float',))
+CONVERTERS.register('category', convert_to_categorical,
+                    guard=lambda profile: MIN_THRESHOLD <= profile.distinct_count <= MAX_THRESHOLD,
+                    after=('datetime',))
+CONVERTERS.register('complex', convert_to_complex,
+                    guard=lambda profile: profile.is_string and 'complex' not in profile.ruled_out
+                    and not MIN_THRESHOLD <= profile.distinct_count <= MAX_THRESHOLD,
+                    cost=4, after=('datetime',))
+CONVERTERS.register('timedelta', convert_to_timedelta,
+                    guard=lambda profile: profile.mentions_time_unit
+                    and not MIN_THRESHOLD <= profile.distinct_count <= MAX_THRESHOLD,
+                    cost=4, after=('datetime',))
+
+def infer_and_convert_data_types(df, parallel=PARALLEL_INFERENCE, known=None, progress=None,
+                                 missing_values_parsed=False, report=None, sampled=SAMPLED_INFERENCE,
+                                 optimize_memory=COST_BASED_REPRESENTATION, sparse=SPARSE_INFERENCE):
     """
         Infers and converts the data types of each column in a DataFrame to optimize storage and accuracy.
 
         The function follows a specific conversion order: it first cleans the data, then attempts to convert
         each column to an optimal data type in the following sequence: boolean, integer, float, datetime,
         category, complex, and timedelta. This order minimizes data loss and prevents unintended type
-        conversions by handling simpler data types first.
+        conversions by handling simpler data types first. Every converter reads from one ColumnProfile per
+        column, so the null mask, numeric coercion and distinct values are computed once per column.
 
         Parameters
         ----------
         df : pd.DataFrame
             The input DataFrame containing columns with mixed data types to be inferred and converted.
+        parallel : bool, optional
+            Spread the columns over a process pool (see parallel.infer_columns_parallel). DataFrames with
+            fewer than PARALLEL_MIN_CELLS cells are always processed serially.
+        known : dict, optional
+            Columns whose converted values are already known (e.g. unchanged since a previous upload of the
+            same file), mapped to these values. They are used as they are, neither wrangled nor inferred.
+        progress : callable, optional
+            Called with the number of columns converted so far, after every column (after all of them when
+            the columns are converted in parallel).
+        missing_values_parsed : bool, optional
+            The DataFrame was read with data_wrangling.missing_value_options() (or read_csv_arrow), its
+            missing values are already NaN (see data_wrangling).
+        report : dict, optional
+            Filled with details of the processing: "modified_cells" maps every text column to the number
+            of cells changed by the data wrangling, "skipped_converters" maps every column to the converters
+            ruled out by its first values (see infer_column_data_type), "sampling" maps every sampled column
+            to its sample size and number of counterexamples (see infer_column_sampled), "representation" maps
+            every column kept as text to its representation and estimated memory (see choose_representation),
+            "sparse_density" maps every sparse column to the share of values it keeps (see sparse_column).
+        sampled : bool, optional
+            Choose the data type of every column on a sample of its rows and verify it on the whole column
+            (see infer_column_sampled). DataFrames with fewer than SAMPLING_MIN_ROWS rows are never sampled.
+        optimize_memory : bool, optional
+            Store every column kept as text in its cheapest representation: Python strings, categorical codes
+            or Arrow strings (see representation.choose_representation). Known columns are used as they are.
+        sparse : bool, optional
+            Store every column with more than SPARSE_NULL_RATIO of missing values as a Sparse column over its
+            converted data type (see representation.sparse_column), instead of choosing its representation.
 
         Returns
         -------
@@ -27,64 +92,168 @@ def infer_and_convert_data_types(df):
             The modified DataFrame with optimized data types, saved as a CSV file named "output.csv".
         """
 
+    # Columns already converted are put back at the end, in their original position
+    columns = df.columns
+    if known:
+        df = df.drop(columns=list(known))
+
     # Data wrangling first
-    df = data_wrangling(df)
-
-    # Attempt to convert
-    for col in df.columns:
-        raw_col = df[col]
-
-        # If this column is bool type, just skip because there are no other possibilities
-        if raw_col.dtype.name == 'bool':
-            continue
-
-        # Attempt to convert to bool
-        converted_bool_col = convert_to_boolean(raw_col)
-        if not raw_col.equals(converted_bool_col) or raw_col.dtype != converted_bool_col.dtype:
-            df[col] = converted_bool_col
-            continue
-
-        # Attempt to convert to int8, int16, int32 or int64
-        converted_int_col = convert_to_int_optimal(raw_col)
-        if not raw_col.equals(converted_int_col) or raw_col.dtype != converted_int_col.dtype:
-            df[col] = converted_int_col
-            continue
-
-        # Attempt to convert to float32 or float64 or float64
-        converted_float_col = convert_to_float_optimal(raw_col)
-        if not raw_col.equals(converted_float_col) or raw_col.dtype != converted_float_col.dtype:
-            df[col] = converted_float_col
-            continue
-
-        # Attempt to convert to datetime in required format or no format (at least one can be convert to datetime)
-        # NaN will be converted to NaT
-        'Must be put after int and float, because it will convert simple int or float to datetime'
-        converted_datetime_col = convert_column_if_date_format(raw_col)
-        if not raw_col.equals(converted_datetime_col) or raw_col.dtype != converted_datetime_col.dtype:
-            df[col] = converted_datetime_col
-            continue
-
-        # Attempt to convert to category type in required min and max
-        converted_categorical_col = convert_to_categorical(raw_col)
-        if not raw_col.equals(converted_categorical_col) or raw_col.dtype != converted_categorical_col.dtype:
-            df[col] = converted_categorical_col
-            continue
-
-        # Attempt to convert to complex type
-        converted_to_complex_col = convert_to_complex(raw_col)
-        if not raw_col.equals(converted_to_complex_col) or raw_col.dtype != converted_to_complex_col.dtype:
-            df[col] = converted_to_complex_col
-            continue
-
-        # Attempt to convert to timedelta[ns]
-        # NaN will be converted to NaT
-        'Must be be put after int and float, because it will convert int or float to timedelta'
-        converted_timedelta_col = convert_to_timedelta(raw_col)
-        if not raw_col.equals(converted_timedelta_col) or raw_col.dtype != converted_timedelta_col.dtype:
-            df[col] = converted_timedelta_col
-            continue
-
-    return df
+    df = data_wrangling(df, missing_values_parsed,
+                        report=report.setdefault('modified_cells', {}) if report is not None else None)
+
+    # Converters skipped in every column, for debugging, and how confident the sampled decisions are
+    skipped = {col: [] for col in df.columns}
+    sampled = sampled and len(df) >= SAMPLING_MIN_ROWS
+    sampling = {col: {} for col in df.columns} if sampled else None
+    representations = {}
+    densities = {}
+    if report is not None:
+        report['skipped_converters'] = skipped
+        if sampled:
+            report['sampling'] = sampling
+        if optimize_memory:
+            report['representation'] = representations
+        if sparse:
+            report['sparse_density'] = densities
+
+    # Columns are independent, big DataFrames can be converted by several processes
+    if parallel and df.size >= PARALLEL_MIN_CELLS and len(df.columns) > 1:
+        converted_cols = infer_columns_parallel(df, skipped=skipped, sampling=sampling)
+    elif sampled:
+        converted_cols = (infer_column_sampled(df[col], skipped[col], sampling[col]) for col in df.columns)
+    else:
+        converted_cols = (infer_column_data_type(df[col], skipped[col]) for col in df.columns)
+
+    # Attempt to convert, the converted columns are gathered and the DataFrame is built once (see replace_columns)
+    new_cols = dict(known or {})
+    for position, (col, converted_col) in enumerate(zip(df.columns, converted_cols)):
+        # A column made mostly of missing values only keeps the other ones
+        details = {}
+        sparse_col = sparse_column(df[col] if converted_col is None else converted_col, details=details) \
+            if sparse else None
+        if sparse_col is not None:
+            converted_col = sparse_col
+            densities[col] = details['sparse_density']
+        # A column kept as text takes the representation with the least memory
+        elif optimize_memory and converted_col is None:
+            details = {}
+            converted_col = choose_representation(df[col], details)
+            if details:
+                representations[col] = details
+        if converted_col is not None:
+            new_cols[col] = converted_col
+        if progress is not None:
+            progress(len(known or ()) + position + 1)
+
+    # Known columns are put back in their original position
+    return replace_columns(df, new_cols, columns)
+
+
+def infer_column_data_type(raw_col, skipped=None):
+    """
+        Infers and converts the data type of a single (already wrangled) column.
+
+        Parameters
+        ----------
+        raw_col : pd.Series
+            The column to be inferred and converted.
+        skipped : list, optional
+            Filled with the converters that were not tried because the first values of the column rule them
+            out (see ColumnProfile.ruled_out).
+
+        Returns
+        -------
+        pd.Series or None
+            The converted column, or None if the column keeps its original data type.
+
+        Notes
+        -------
+        The converters of CONVERTERS are tried in the order of CONVERTERS.ordered(), skipping the ones whose guard
+        rules the column out.
+        """
+
+    # If this column is bool type, just skip because there are no other possibilities
+    if raw_col.dtype.name == 'bool':
+        return None
+
+    # Profile the column once, shared by the guards and the converters
+    profile = ColumnProfile(raw_col)
+
+    # Converters that cannot accept the first values of the column are not tried on the whole column
+    if skipped is not None:
+        skipped.extend(profile.ruled_out)
+
+    # The first converter that accepts the column converts it
+    return CONVERTERS.convert(raw_col, profile)
+
+
+def infer_column_sampled(raw_col, skipped=None, sampling=None):
+    """
+        Infers and converts the data type of a single (already wrangled) column from a sample of its rows, then
+        verifies the decision on the whole column.
+
+        Parameters
+        ----------
+        raw_col : pd.Series
+            The column to be inferred and converted.
+        skipped : list, optional
+            Filled with the converters ruled out by the first values (see infer_column_data_type).
+        sampling : dict, optional
+            Filled with "sample_size", the number of rows sampled, and "counterexamples", the number of rows
+            that contradict the decision taken on the sample (0 when it holds for the whole column).
+
+        Returns
+        -------
+        pd.Series or None
+            The converted column, or None if the column keeps its original data type. It is always the result
+            infer_column_data_type gives the whole column.
+
+        Notes
+        -------
+        The converters are tried on a stratified sample (see sampling.stratified_sample), only the converter
+        chosen there runs on the whole column. The converters tried before it failed on the sample, so they fail
+        on the whole column too: int, float, datetime and complex need every value to convert, and bool and
+        category depend on the distinct values, which are checked on the whole column with the bounded probe
+        of ColumnProfile. A column kept as it is is checked for time units (timedelta needs one value only).
+        With any counterexample the whole column is inferred as usual.
+        """
+    sample = stratified_sample(raw_col)
+    sample_skipped = []
+    converter = converter_of(infer_column_data_type(sample, sample_skipped))
+
+    profile = ColumnProfile(raw_col)
+    sample_profile = ColumnProfile(sample)
+
+    # Values that were not sampled can change the decisions based on the distinct values
+    counterexamples = 0
+    if sample_profile.distinct_count <= sample_profile.distinct_limit and \
+            profile.distinct_count != sample_profile.distinct_count:
+        counterexamples = count_unseen_values(profile, sample_profile.distinct_values)
+
+    converted_col = None
+    if not counterexamples and converter is None:
+        # One value with a time unit is enough for timedelta
+        if profile.has_time_unit:
+            counterexamples = int(pd.to_timedelta(profile.non_null, errors='coerce').notna().sum())
+    elif not counterexamples:
+        converted_col = CONVERTERS[converter].function(raw_col, profile)
+        if converted_col is raw_col or (raw_col.equals(converted_col) and raw_col.dtype == converted_col.dtype):
+            converted_col = None
+        if converter_of(converted_col) != converter:
+            counterexamples = max(count_counterexamples(profile, converter), 1)
+
+    if sampling is not None:
+        sampling.update(sample_size=len(sample), counterexamples=counterexamples)
+
+    # The sample was misleading, the whole column decides
+    if counterexamples:
+        return infer_column_data_type(raw_col, skipped)
+
+    if skipped is not None:
+        skipped.extend(sample_skipped)
+    return converted_col
+
+
 # Test
 # df = pd.read_csv('processed_file.csv')
 # infer_and_convert_data_types(df)
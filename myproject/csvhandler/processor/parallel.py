@@ -0,0 +1,241 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from .global_variables import PARALLEL_WORKERS
+
+# Process pools shared by all requests of this process, one per number of workers, created on first use
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(max_workers=PARALLEL_WORKERS):
+    """
+        Returns the process pool used for parallel type inference, creating it on first use.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            Number of worker processes of the pool (one per CPU if None).
+
+        Returns
+        -------
+        ProcessPoolExecutor
+            The shared process pool with this number of workers.
+        """
+    max_workers = max_workers or os.cpu_count()
+    with _executors_lock:
+        if max_workers not in _executors:
+            _executors[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return _executors[max_workers]
+
+
+def reset_executor(executor):
+    """
+        Discards a process pool, the next call to get_executor creates a new one.
+
+        Parameters
+        ----------
+        executor : ProcessPoolExecutor
+            The pool, e.g. broken because one of its workers died.
+        """
+    with _executors_lock:
+        for max_workers, known in list(_executors.items()):
+            if known is executor:
+                del _executors[max_workers]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def infer_columns_parallel(df, max_workers=PARALLEL_WORKERS, skipped=None, sampling=None):
+    """
+        Infers and converts the data types of the columns of a DataFrame with a process pool.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The wrangled DataFrame whose columns will be inferred and converted.
+        max_workers : int, optional
+            Number of worker processes, sizes the pool and the column batches (one per CPU if None).
+        skipped : dict, optional
+            Filled with the converters skipped in every column (see main.infer_column_data_type).
+        sampling : dict, optional
+            The columns are inferred from samples (see main.infer_column_sampled), filled with the sample
+            size and counterexamples of every column.
+
+        Returns
+        -------
+        list
+            The converted columns (None where a column keeps its type), in the original column order.
+
+        Notes
+        -------
+        Columns are grouped into batches of about the same number of cells, two batches per worker.
+        The whole DataFrame is never pickled: numeric and boolean columns are copied once into shared
+        memory and the worker reads them from there, only text columns are pickled, batch by batch.
+        If a worker dies (e.g. killed for using too much memory), the pool is replaced for the next calls
+        and the columns are inferred in this process.
+        """
+    workers = max_workers or os.cpu_count()
+    batches = split_into_batches(df, workers * 2)
+    executor = get_executor(workers)
+
+    blocks = []
+    try:
+        futures = []
+        for batch in batches:
+            specs = []
+            for position in batch:
+                spec, block = share_column(df.iloc[:, position])
+                if block is not None:
+                    blocks.append(block)
+                specs.append((position, spec))
+            futures.append(executor.submit(infer_batch, df.index, specs, sampling is not None))
+        results = [result for future in futures for result in future.result()]
+    except BrokenProcessPool:
+        # A worker died, the pool cannot run anything anymore
+        reset_executor(executor)
+        specs = [(position, ('series', df.iloc[:, position])) for position in range(len(df.columns))]
+        results = infer_batch(df.index, specs, sampling is not None)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    # Reassemble the results in the original column order
+    converted_cols = [None] * len(df.columns)
+    for position, converted_col, skipped_converters, column_sampling in results:
+        converted_cols[position] = converted_col
+        if skipped is not None:
+            skipped[df.columns[position]] = skipped_converters
+        if sampling is not None:
+            sampling[df.columns[position]] = column_sampling
+
+    return converted_cols
+
+
+def split_into_batches(df, batch_count):
+    """
+        Splits the column positions of a DataFrame into batches of about the same size.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The DataFrame whose columns will be split.
+        batch_count : int
+            The number of batches wanted.
+
+        Returns
+        -------
+        list of list of int
+            The column positions of each batch, empty batches are dropped.
+
+        Notes
+        -------
+        Text columns cost several times more than numeric ones, they are weighted accordingly and the
+        heaviest columns are placed first, each in the currently lightest batch.
+        """
+    weights = [4 if df.dtypes.iloc[position] == object else 1 for position in range(len(df.columns))]
+    batches = [[] for _ in range(min(batch_count, len(df.columns)))]
+    loads = [0] * len(batches)
+
+    for position in sorted(range(len(weights)), key=lambda p: -weights[p]):
+        lightest = loads.index(min(loads))
+        batches[lightest].append(position)
+        loads[lightest] += weights[position]
+
+    return [sorted(batch) for batch in batches if batch]
+
+
+def share_column(column):
+    """
+        Prepares a column to be sent to a worker process.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The column to send.
+
+        Returns
+        -------
+        tuple
+            The column description sent to the worker and the SharedMemory block holding its data
+            (None if the column is sent pickled).
+
+        Notes
+        -------
+        Numeric and boolean numpy columns are written into a shared memory block, the worker only receives
+        the block name, dtype and length. Other columns (text, extension types) are sent as a Series.
+        """
+    if column.dtype.kind not in 'biufc' or len(column) == 0:
+        return ('series', column), None
+
+    values = column.to_numpy()
+    block = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+    return ('shared', block.name, values.dtype.str, len(values), column.name), block
+
+
+def load_column(spec, index):
+    """
+        Rebuilds in a worker process a column prepared by share_column.
+
+        Parameters
+        ----------
+        spec : tuple
+            The column description created by share_column.
+        index : pd.Index
+            The index of the DataFrame.
+
+        Returns
+        -------
+        pd.Series
+            The column, its data copied out of shared memory.
+        """
+    if spec[0] == 'series':
+        return spec[1]
+
+    _, block_name, dtype, length, name = spec
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        values = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf).copy()
+    finally:
+        block.close()
+    return pd.Series(values, index=index, name=name)
+
+
+def infer_batch(index, specs, sampled=False):
+    """
+        Worker entry point: infers and converts the data types of a batch of columns.
+
+        Parameters
+        ----------
+        index : pd.Index
+            The index of the DataFrame.
+        specs : list of tuple
+            The column positions and descriptions created by share_column.
+        sampled : bool, optional
+            Infer the columns from samples (see main.infer_column_sampled).
+
+        Returns
+        -------
+        list of tuple
+            The column positions, converted columns (None where a column keeps its type), skipped converters
+            and sampling details (empty unless sampled).
+        """
+    # Imported here, main imports this module
+    from .main import infer_column_data_type, infer_column_sampled
+
+    results = []
+    for position, spec in specs:
+        skipped, sampling = [], {}
+        column = load_column(spec, index)
+        if sampled:
+            converted_col = infer_column_sampled(column, skipped, sampling)
+        else:
+            converted_col = infer_column_data_type(column, skipped)
+        results.append((position, converted_col, skipped, sampling))
+    return results
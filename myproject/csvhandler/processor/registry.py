@@ -0,0 +1,169 @@
+import threading
+
+
+class Converter:
+    """
+        A converter of infer_column_data_type and what the registry knows about it.
+
+        Parameters
+        ----------
+        name : str
+            The name of the converter, e.g. "int".
+        function : callable
+            Called with the column and its ColumnProfile, returns the converted column, or the column itself
+            if the converter does not apply.
+        guard : callable, optional
+            Called with the ColumnProfile, False if the converter cannot apply to the column. It must be cheap
+            (e.g. read the null count or the prescreen of the first values) and never reject a column the
+            function would convert.
+        cost : float, optional
+            Estimated cost of running the function, relative to the other converters.
+        after : tuple, optional
+            Names of the converters that must be tried first because they can accept the same columns, e.g.
+            datetime after int and float since 2020 is both an int and a date.
+
+        Attributes
+        ----------
+        attempts : int
+            Number of columns the function ran on in this process.
+        hits : int
+            Number of these columns it converted.
+
+        Notes
+        -------
+        The counters are shared by every thread of the process (requests and background jobs), they are only
+        updated through ConverterRegistry.record().
+        """
+
+    def __init__(self, name, function, guard=None, cost=1.0, after=()):
+        self.name = name
+        self.function = function
+        self.guard = guard
+        self.cost = cost
+        self.after = tuple(after)
+        self.attempts = 0
+        self.hits = 0
+
+    @property
+    def hit_rate(self):
+        """Share of the attempts that converted the column, 1/2 before any attempt."""
+        return (self.hits + 1) / (self.attempts + 2)
+
+
+class ConverterRegistry:
+    """
+        Ordered set of converters tried one after the other on a column until one of them converts it.
+
+        Notes
+        -------
+        The order only has to respect the `after` constraints: two converters without a constraint between them
+        never accept the same column, so trying one before the other does not change the result. Among the
+        converters whose constraints are met, the one with the best hit rate per cost is tried first, then the
+        one registered first. A new converter is added with register(), in a module imported with this one
+        so that the worker processes of parallel inference have it too.
+        """
+
+    def __init__(self):
+        self.converters = {}
+        self.lock = threading.Lock()
+
+    def register(self, name, function, guard=None, cost=1.0, after=()):
+        """
+            Adds a converter, see Converter for the parameters.
+
+            Returns
+            -------
+            Converter
+                The registered converter.
+
+            Raises
+            ------
+            ValueError
+                If a converter with the same name is registered or `after` names an unknown converter.
+            """
+        if name in self.converters:
+            raise ValueError(f"A converter named {name} is already registered.")
+        unknown = [other for other in after if other not in self.converters]
+        if unknown:
+            raise ValueError(f"Unknown converters in after: {', '.join(unknown)}.")
+
+        converter = Converter(name, function, guard, cost, after)
+        self.converters[name] = converter
+        return converter
+
+    def __getitem__(self, name):
+        return self.converters[name]
+
+    def __iter__(self):
+        return iter(self.converters)
+
+    def ordered(self):
+        """
+            Returns the converters in the order they are tried.
+
+            Returns
+            -------
+            list
+                Every converter after the ones named in its `after`, the best hit rate per cost first otherwise.
+            """
+        remaining = list(self.converters.values())
+        with self.lock:
+            priority = {converter.name: converter.hit_rate / converter.cost for converter in remaining}
+        done = set()
+        order = []
+        while remaining:
+            ready = [converter for converter in remaining if done.issuperset(converter.after)]
+            # Registration order breaks ties, max() keeps the first of equal keys
+            chosen = max(ready, key=lambda converter: priority[converter.name])
+            remaining.remove(chosen)
+            done.add(chosen.name)
+            order.append(chosen)
+        return order
+
+    def convert(self, column, profile):
+        """
+            Converts a column with the first converter that accepts it.
+
+            Parameters
+            ----------
+            column : pd.Series
+                The (wrangled) column.
+            profile : ColumnProfile
+                The profile of the column.
+
+            Returns
+            -------
+            pd.Series or None
+                The converted column, or None if no converter accepts the column.
+
+            Notes
+            -------
+            A converter returning the column itself did not apply, one changing the data type did, the values
+            of the column are only compared when a converter returns a new column with the same data type.
+            """
+        for converter in self.ordered():
+            if converter.guard is not None and not converter.guard(profile):
+                continue
+
+            converted_col = converter.function(column, profile)
+            hit = converted_col is not column and (converted_col.dtype != column.dtype
+                                                   or not column.equals(converted_col))
+            self.record(converter, hit)
+            if hit:
+                return converted_col
+        return None
+
+    def record(self, converter, hit):
+        """
+            Counts an attempt of a converter, under the lock of the registry.
+
+            Parameters
+            ----------
+            converter : Converter
+                The converter that ran.
+            hit : bool
+                True if it converted the column.
+            """
+        with self.lock:
+            converter.attempts += 1
+            converter.hits += hit
@@ -0,0 +1,197 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .column_profile import ColumnProfile
+from .global_variables import SPARSE_NULL_RATIO
+
+# Representations of a text column, in order of preference when two of them cost the same
+REPRESENTATIONS = ('object', 'category', 'dictionary', 'string')
+
+# Bytes of a pointer to a Python object and of an empty Python string, a string adds one byte per ASCII character
+POINTER_BYTES = np.dtype(object).itemsize
+STRING_OBJECT_BYTES = sys.getsizeof('')
+
+# Bytes of one offset of an Arrow string array
+OFFSET_BYTES = 4
+
+# Arrow-backed strings, as given by arrow_parsing.read_csv_arrow
+ARROW_STRING_DTYPE = pd.StringDtype('pyarrow')
+
+# Data types of the values of a sparse column, missing values are NaN
+SPARSE_SUBTYPES = ('float16', 'float32', 'float64', 'object')
+
+
+def code_bytes(distinct_count):
+    """
+        Width of the codes of a categorical column, the smallest integer pandas picks for its categories.
+
+        Parameters
+        ----------
+        distinct_count : int
+            The number of categories.
+
+        Returns
+        -------
+        int
+            1, 2, 4 or 8 bytes per row.
+        """
+    for int_type in (np.int8, np.int16, np.int32):
+        if distinct_count < np.iinfo(int_type).max:
+            return np.dtype(int_type).itemsize
+    return np.dtype(np.int64).itemsize
+
+
+def estimate_memory(profile, distinct_values=None):
+    """
+        Estimates the memory of a column of strings in every representation.
+
+        Parameters
+        ----------
+        profile : ColumnProfile
+            The profile of the column, every non-null value is a string.
+        distinct_values : array-like, optional
+            The distinct non-null values, None if there are too many for a categorical representation to pay off.
+
+        Returns
+        -------
+        dict
+            The bytes of the column (index excluded) for "object" (one Python string per value), "string" (Arrow
+            offsets and characters), and unless there are too many distinct values, "category" (codes and Python
+            strings for the categories) and "dictionary" (codes and Arrow strings for the categories).
+
+        Notes
+        -------
+        Characters are counted as one byte, as in ASCII text. Null values cost a pointer in an object column and
+        a code in a categorical one, an Arrow column adds a validity bit per row when there is one.
+        """
+    rows = profile.size
+    estimates = {
+        'object': rows * POINTER_BYTES + profile.non_null_count * STRING_OBJECT_BYTES + profile.text_length,
+        'string': (rows + 1) * OFFSET_BYTES + profile.text_length + (-(-rows // 8) if profile.null_count else 0),
+    }
+
+    if distinct_values is not None:
+        distinct_count = len(distinct_values)
+        distinct_length = sum(len(value) for value in distinct_values)
+        codes = rows * code_bytes(distinct_count)
+        estimates['category'] = codes + distinct_count * (POINTER_BYTES + STRING_OBJECT_BYTES) + distinct_length
+        estimates['dictionary'] = codes + (distinct_count + 1) * OFFSET_BYTES + distinct_length
+
+    return {representation: estimates[representation] for representation in REPRESENTATIONS
+            if representation in estimates}
+
+
+def choose_representation(column, details=None):
+    """
+        Converts a text column to its cheapest representation in memory.
+
+        Parameters
+        ----------
+        column : pd.Series
+            A column kept as text by infer_column_data_type (object or Arrow-backed strings).
+        details : dict, optional
+            Filled with "representation", the chosen one, "estimated_bytes", its estimated memory, and
+            "estimated_savings", the bytes saved compared to the current representation.
+
+        Returns
+        -------
+        pd.Series or None
+            The converted column: categorical (with Python or Arrow strings as categories for "category" and
+            "dictionary") or Arrow-backed strings, None if the column is not text or is already the cheapest.
+
+        Notes
+        -------
+        The distinct values are only counted as long as a categorical representation can still be cheaper than
+        Arrow strings: the codes take at least one byte per row and every category at least one offset.
+        """
+    current = 'string' if isinstance(column.dtype, pd.StringDtype) else 'object'
+    if current == 'object' and column.dtype != object:
+        return None
+
+    profile = ColumnProfile(column)
+    if profile.inferred_type != 'string':
+        return None
+
+    # Beyond this number of distinct values the codes and offsets alone cost more than Arrow strings
+    string_bytes = estimate_memory(profile)['string']
+    limit = max((string_bytes - profile.size) // OFFSET_BYTES, 0)
+    distinct_values = profile.distinct_up_to(limit)
+    estimates = estimate_memory(profile, distinct_values if len(distinct_values) <= limit else None)
+
+    representation = min(estimates, key=estimates.get)
+    if details is not None:
+        details.update(representation=representation, estimated_bytes=int(estimates[representation]),
+                       estimated_savings=int(estimates[current] - estimates[representation]))
+
+    if representation == current:
+        return None
+    if representation in ('category', 'dictionary'):
+        categories_dtype = object if representation == 'category' else ARROW_STRING_DTYPE
+        categories = pd.Index(distinct_values, dtype=categories_dtype).sort_values()
+        return column.astype(pd.CategoricalDtype(categories))
+    if representation == 'string':
+        return column.astype(ARROW_STRING_DTYPE)
+    return column.astype(object)
+
+
+def sparse_subtype(column):
+    """
+        Data type of the values a sparse column keeps for a column, missing values being NaN.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The (converted) column.
+
+        Returns
+        -------
+        np.dtype or None
+            The data type of a float or object column, None if the column cannot be sparse (e.g. bool, datetime,
+            categorical or Arrow-backed strings, which have a compact representation already, or nullable
+            integers, which a sparse column could only keep as floats).
+        """
+    dtype = column.dtype
+    if isinstance(dtype, np.dtype) and dtype.name in SPARSE_SUBTYPES:
+        return dtype
+    return None
+
+
+def sparse_column(column, null_ratio=SPARSE_NULL_RATIO, details=None):
+    """
+        Converts a column made mostly of missing values to a sparse column, which only keeps the other values.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The (converted) column.
+        null_ratio : float, optional
+            The share of missing values above which the column is sparse.
+        details : dict, optional
+            Filled with "sparse_density", the share of values kept, when the column is converted.
+
+        Returns
+        -------
+        pd.Series or None
+            The column with a Sparse data type over sparse_subtype(column) and NaN as fill value, None if it has
+            too few missing values or cannot be sparse.
+
+        Notes
+        -------
+        A sparse column keeps every value that is not missing with its position (4 bytes). Integer columns
+        stay dense: a sparse column cannot hold missing integers, they would be read back as floats.
+        """
+    if not len(column) or isinstance(column.dtype, pd.SparseDtype):
+        return None
+    null_count = int(column.isna().sum())
+    if null_count / len(column) <= null_ratio:
+        return None
+
+    subtype = sparse_subtype(column)
+    if subtype is None:
+        return None
+
+    if details is not None:
+        details['sparse_density'] = (len(column) - null_count) / len(column)
+    return column.astype(pd.SparseDtype(subtype, np.nan))
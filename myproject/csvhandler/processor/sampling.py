@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from .global_variables import SAMPLE_SIZE, SAMPLE_STRATA
+from .infer_functions import parse_complex, parse_dates_mixed
+
+
+def stratified_sample(column, sample_size=SAMPLE_SIZE, strata=SAMPLE_STRATA):
+    """
+        Draws rows from every part of a column, so a value that only appears late in the file can be sampled.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The column to sample.
+        sample_size : int, optional
+            Number of rows to draw.
+        strata : int, optional
+            The column is cut into this many slices of equal length, the same number of rows is drawn from each.
+
+        Returns
+        -------
+        pd.Series
+            The sampled rows in their original order (index kept), the column itself if it is not bigger than
+            the sample.
+
+        Notes
+        -------
+        The draw is seeded, the same column always gives the same sample.
+        """
+    if len(column) <= sample_size:
+        return column
+
+    rng = np.random.default_rng(0)
+    bounds = np.linspace(0, len(column), strata + 1).astype(int)
+    per_stratum = -(-sample_size // strata)
+    positions = [
+        start + rng.choice(end - start, size=min(per_stratum, end - start), replace=False)
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    return column.iloc[np.sort(np.concatenate(positions))]
+
+
+def converter_of(converted_col):
+    """
+        Name of the converter of infer_column_data_type that gave a converted column.
+
+        Parameters
+        ----------
+        converted_col : pd.Series or None
+            The result of infer_column_data_type.
+
+        Returns
+        -------
+        str or None
+            "bool", "int", "float", "datetime", "category", "complex" or "timedelta", None if the column kept
+            its data type.
+        """
+    if converted_col is None:
+        return None
+
+    dtype = converted_col.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'category'
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    return {'f': 'float', 'M': 'datetime', 'c': 'complex', 'm': 'timedelta'}.get(dtype.kind)
+
+
+def count_counterexamples(profile, converter):
+    """
+        Counts the values of a column that prevent a converter from converting it.
+
+        Parameters
+        ----------
+        profile : ColumnProfile
+            The profile of the whole column.
+        converter : str
+            A converter name (see converter_of) whose conversion failed on the column.
+
+        Returns
+        -------
+        int
+            The number of rows holding such a value (null values count for float and datetime, which do not
+            accept any).
+        """
+    if converter == 'int':
+        numeric = profile.numeric
+        return int((numeric.isna() | (numeric % 1 != 0)).sum())
+    if converter == 'float':
+        return profile.null_count + int(profile.numeric.isna().sum())
+    if converter == 'datetime':
+        return profile.null_count + int(parse_dates_mixed(profile.non_null).isna().sum())
+    if converter == 'complex':
+        if not profile.is_string:
+            return profile.non_null_count
+        return int((~parse_complex(profile.non_null)[1]).sum())
+    return 0
+
+
+def count_unseen_values(profile, sample_values):
+    """
+        Counts the rows of a column holding a value that is not in the sample.
+
+        Parameters
+        ----------
+        profile : ColumnProfile
+            The profile of the whole column.
+        sample_values : array-like
+            The distinct values of the sample.
+
+        Returns
+        -------
+        int
+            The number of non-null rows whose value was not sampled.
+        """
+    return int((~profile.non_null.isin(sample_values)).sum())
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+from .global_variables import DISTINCT_SKETCH_PRECISION
+
+
+class DistinctSketch:
+    """
+        Mergeable distinct counter of one column: exact up to a small number of values, approximate beyond.
+
+        Parameters
+        ----------
+        limit : int
+            Number of distinct values that are counted exactly, and kept in order of first appearance.
+        key : callable, optional
+            Gives the key of a value, values with the same key are the same value (str by default).
+        precision : int, optional
+            The HyperLogLog registers are indexed by this number of bits of the hash, 2 ** precision registers
+            of one byte each (the relative error is about 1.04 / sqrt(2 ** precision)).
+
+        Attributes
+        ----------
+        exact : dict
+            The first `limit + 1` distinct values in order of first appearance, keyed by their key.
+        registers : np.ndarray or None
+            The HyperLogLog registers, None as long as the exact values are all the distinct values.
+
+        Notes
+        -------
+        The exact values are enough for boolean (exactly 2 values) and category (MIN_THRESHOLD..MAX_THRESHOLD
+        values) decisions. Once there are more, every key is hashed into the registers, which take a fixed
+        amount of memory however many values there are. Two sketches of the same column (e.g. from two chunks
+        or two worker processes) are combined with merge(), the hashes do not depend on the process.
+        """
+
+    def __init__(self, limit, key=str, precision=DISTINCT_SKETCH_PRECISION):
+        self.limit = limit
+        self.key = key
+        self.precision = precision
+        self.exact = {}
+        self.registers = None
+
+    @property
+    def overflow(self):
+        """True if there are more than `limit` distinct values."""
+        return self.registers is not None
+
+    def add(self, values, keys=None, overflow=False):
+        """
+            Adds the values of a chunk.
+
+            Parameters
+            ----------
+            values : iterable
+                Distinct values of the chunk in order of first appearance (at most `limit + 1` are kept).
+            keys : pd.Series, optional
+                The keys of every non-null value of the chunk, hashed into the registers once there are more
+                than `limit` distinct values.
+            overflow : bool, optional
+                True if the chunk had more distinct values than the ones given.
+        """
+        for value in values:
+            if len(self.exact) > self.limit:
+                break
+            self.exact.setdefault(self.key(value), value)
+
+        if not self.overflow and (overflow or len(self.exact) > self.limit):
+            # The values seen so far are all in the exact values
+            self.registers = np.zeros(2 ** self.precision, dtype=np.uint8)
+            self.add_hashes(pd.Series(list(self.exact), dtype=object))
+        if self.overflow and keys is not None:
+            self.add_hashes(keys)
+
+    def add_hashes(self, keys):
+        """
+            Hashes keys into the registers.
+
+            Parameters
+            ----------
+            keys : pd.Series
+                The keys.
+        """
+        # Factorizing first only pays off with few distinct values, the keys of a sketch have many
+        hashes = pd.util.hash_array(np.asarray(keys, dtype=object), categorize=False)
+
+        # The first bits of the hash choose the register, the position of the first 1 in the others is kept
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision + 1 - bit_length(remainder)
+
+        # Highest rank of every register: which (register, rank) pairs occur, then the last one of each register
+        ranks = 64 - self.precision + 2
+        found = np.bincount(index * ranks + rank, minlength=len(self.registers) * ranks).reshape(-1, ranks) > 0
+        highest = (found * np.arange(ranks)).max(axis=1).astype(np.uint8)
+        np.maximum(self.registers, highest, out=self.registers)
+
+    def merge(self, other):
+        """
+            Merges the sketch of the following rows of the same column into this sketch.
+
+            Parameters
+            ----------
+            other : DistinctSketch
+                The sketch built from the rows that come after the rows of this sketch.
+
+            Returns
+            -------
+            DistinctSketch
+                This sketch, updated.
+        """
+        self.add(other.exact.values(), overflow=other.overflow)
+        if other.overflow:
+            np.maximum(self.registers, other.registers, out=self.registers)
+        elif self.overflow:
+            self.add_hashes(pd.Series(list(other.exact), dtype=object))
+        return self
+
+    def count(self):
+        """
+            Returns the number of distinct values.
+
+            Returns
+            -------
+            int
+                The exact number up to `limit`, beyond that the HyperLogLog estimate (at least `limit + 1`).
+        """
+        if not self.overflow:
+            return len(self.exact)
+
+        registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / registers)
+        estimate = alpha * registers ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        # Few values: linear counting of the empty registers is more accurate
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * registers and empty:
+            estimate = registers * np.log(registers / empty)
+        return max(int(round(estimate)), self.limit + 1)
+
+
+def bit_length(values):
+    """
+        Number of bits of unsigned integers, without the leading zeros.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The uint64 values.
+
+        Returns
+        -------
+        np.ndarray
+            The bit length of every value, 0 for 0.
+        """
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= np.uint64(1 << shift)
+        values = np.where(high, values >> np.uint64(shift), values)
+        lengths += high * shift
+    return lengths + (values > 0)
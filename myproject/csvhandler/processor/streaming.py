@@ -0,0 +1,464 @@
+import numpy as np
+import pandas as pd
+
+from .column_profile import ColumnProfile
+from .columnar import frame_to_arrow, parquet_table
+from .data_wrangling import data_wrangling, missing_value_options
+from .global_variables import MAX_THRESHOLD, MIN_THRESHOLD, STREAMING_CHUNK_SIZE
+from .sketch import DistinctSketch
+from .infer_functions import (detect_dates, parse_complex, guess_datetime_format, is_exact_float16,
+                              optimal_int_dtype, optimal_float_dtype, to_boolean, true_values)
+
+
+class ColumnTypeState:
+    """
+        Mergeable type state of one column, updated chunk by chunk while a CSV file is streamed.
+
+        Attributes
+        ----------
+        rows : int
+            Number of rows seen so far.
+        null_count : int
+            Number of null values seen so far.
+        distinct : DistinctSketch
+            Distinct non-null values, keyed by their text form: the first `ColumnProfile.distinct_limit + 1`
+            in order of first appearance (enough for boolean and category decisions), approximately counted
+            beyond.
+
+        Notes
+        -------
+        The state walks down the same lattice as the in-memory converters, bool -> Int8 -> UInt8 -> Int16 ->
+        ... -> UInt64 -> float16 -> float32 -> float64 -> datetime -> category -> complex -> timedelta -> object:
+        every chunk can only rule candidates out, and running min/max pick the integer or float width at the end
+        (float16 also needs every value of every chunk to be exact as float16).
+        Two states of the same column (e.g. from two halves of a file) can be combined with merge().
+        Chunks are read with the default pandas parser, so a column can be numeric in one chunk and text
+        in another, numeric chunks are then judged by the text form of their values.
+        """
+
+    def __init__(self):
+        self.rows = 0
+        self.null_count = 0
+        self.distinct = DistinctSketch(ColumnProfile.distinct_limit, key=distinct_key)
+        self.kinds = set()
+        self.integral = True
+        self.numeric = True
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.half = True
+        self.dates = True
+        self.date_dtype = None
+        self.date_format = None
+        self.complex = True
+        self.time_unit = False
+        self.timedelta = False
+
+    def update(self, column):
+        """
+            Updates the state with one (wrangled) chunk of the column.
+
+            Parameters
+            ----------
+            column : pd.Series
+                The values of the column in the chunk.
+            """
+        profile = ColumnProfile(column)
+        self.rows += profile.size
+        self.null_count += profile.null_count
+
+        # A chunk without any value says nothing about the data type read_csv picks for the column
+        if not profile.non_null_count:
+            return
+
+        kind = column_kind(column)
+        self.kinds.add(kind)
+
+        # Numeric chunks of a text column are judged by their text, e.g. 2020 is a date and 3 a complex number
+        text = as_text(profile.non_null)
+        self.distinct.add(profile.distinct_values, text, profile.distinct_count > profile.distinct_limit)
+
+        # Integer and float: every value must be numeric, min and max are kept for the width. A chunk of
+        # True/False is not, the whole column holds them as Python booleans (object) unless it is a bool column
+        if self.numeric:
+            self.numeric = profile.is_numeric and kind != 'bool'
+            self.integral = self.integral and profile.is_integral
+            if self.numeric:
+                # Python numbers, numpy compares uint64 and int64 values as floats
+                self.minimum = min(self.minimum, profile.minimum.item())
+                self.maximum = max(self.maximum, profile.maximum.item())
+                self.half = self.half and is_exact_float16(profile.numeric)
+
+        # Datetime: no NaN anywhere and every value is a date, the first value decides the format
+        if self.dates and not self.null_count:
+            self.dates = detect_dates(text)[0]
+            if self.dates and self.date_dtype is None:
+                self.date_format = guess_datetime_format(str(text.iloc[0]))
+                self.date_dtype = str(pd.to_datetime(text.iloc[:1], format=self.date_format, errors='coerce').dtype)
+        elif self.null_count:
+            self.dates = False
+
+        # Complex: every value must parse, numbers always do, booleans never do
+        if self.complex and kind == 'text':
+            self.complex = profile.is_string and bool(parse_complex(text)[1].all())
+        elif kind == 'bool':
+            self.complex = False
+
+        # Timedelta: one value with a time unit and one value that converts are enough
+        if kind == 'text':
+            self.time_unit = self.time_unit or profile.has_time_unit
+        if not self.timedelta:
+            self.timedelta = kind != 'text' or bool(pd.to_timedelta(text, errors='coerce').notna().any())
+
+    @property
+    def distinct_count(self):
+        """
+        Number of distinct non-null values, exact up to `ColumnProfile.distinct_limit`, estimated beyond.
+        """
+        return self.distinct.count()
+
+    def merge(self, other):
+        """
+            Merges the state of the following rows of the same column into this state.
+
+            Parameters
+            ----------
+            other : ColumnTypeState
+                The state built from the rows that come after the rows of this state.
+
+            Returns
+            -------
+            ColumnTypeState
+                This state, updated.
+            """
+        if other.date_format is not None and self.date_format is None and not self.kinds:
+            self.date_format, self.date_dtype = other.date_format, other.date_dtype
+        self.rows += other.rows
+        self.null_count += other.null_count
+        self.distinct.merge(other.distinct)
+        self.kinds |= other.kinds
+        self.numeric = self.numeric and other.numeric
+        self.integral = self.integral and other.integral
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.half = self.half and other.half
+        self.dates = self.dates and other.dates and not self.null_count
+        self.complex = self.complex and other.complex
+        self.time_unit = self.time_unit or other.time_unit
+        self.timedelta = self.timedelta or other.timedelta
+        return self
+
+    def dtype(self):
+        """
+            Returns the data type infer_and_convert_data_types gives the whole column.
+
+            Returns
+            -------
+            str
+                The pandas dtype string, e.g. 'Int8', 'float32', 'datetime64[ns]' or 'object'.
+            """
+        read_dtype = self.read_dtype()
+
+        # Bool read as is, or exactly two distinct values (nullable if some are missing)
+        if read_dtype == 'bool' or self.distinct_count == 2:
+            return 'boolean' if self.null_count else 'bool'
+
+        # Optimal int (a column without any value is Int64)
+        if self.numeric and self.integral:
+            # A column read as float64 holds floats, even where its chunks were read as integers
+            minimum, maximum = self.minimum, self.maximum
+            if read_dtype == 'float64':
+                minimum, maximum = float(minimum), float(maximum)
+            int_type = optimal_int_dtype(minimum, maximum) if self.kinds else 'Int64'
+            if int_type is not None:
+                return int_type
+
+        # Optimal float, NaN is not allowed. A float64 column staying float64 is not converted, it can be a category
+        if self.numeric and not self.null_count:
+            float_type = optimal_float_dtype(self.minimum, self.maximum, self.half)
+            if float_type != read_dtype:
+                return float_type
+
+        if read_dtype == 'object' and self.dates and not self.null_count and self.date_dtype is not None:
+            return self.date_dtype
+
+        if MAX_THRESHOLD >= self.distinct_count >= MIN_THRESHOLD:
+            return 'category'
+
+        if read_dtype == 'object' and self.complex:
+            return 'complex128'
+
+        if read_dtype == 'object' and self.time_unit and self.timedelta:
+            return 'timedelta64[ns]'
+
+        return read_dtype
+
+    def cast(self, column):
+        """
+            Converts one (wrangled) chunk of the column to the data type of the whole column.
+
+            Parameters
+            ----------
+            column : pd.Series
+                The values of the column in the chunk.
+
+            Returns
+            -------
+            pd.Series
+                The converted chunk, the same values the in-memory converters give these rows.
+            """
+        dtype = self.dtype()
+        read_dtype = self.read_dtype()
+
+        if dtype in ('bool', 'boolean'):
+            if read_dtype == 'bool':
+                return column.astype(bool)
+            # The values of the whole column: text in a text column, as read otherwise
+            if read_dtype == 'object':
+                column = as_text(column)
+                distinct_values = list(self.distinct.exact)
+            else:
+                distinct_values = list(self.distinct.exact.values())
+            return to_boolean(column, true_values(distinct_values)).astype(dtype)
+
+        if dtype.startswith(('Int', 'UInt', 'float')):
+            return pd.to_numeric(column, errors='coerce').astype(dtype)
+
+        if dtype.startswith('datetime64'):
+            return pd.to_datetime(as_text(column), format=self.date_format, errors='coerce')
+
+        if dtype == 'category':
+            # Same categories in every chunk, sorted like astype('category') sorts them
+            if read_dtype == 'object':
+                categories = sorted(self.distinct.exact)
+                column = as_text(column)
+            else:
+                categories = sorted(self.distinct.exact.values())
+            return column.astype(pd.CategoricalDtype(categories))
+
+        if dtype == 'complex128':
+            null_mask = column.isna()
+            values = np.full(len(column), complex(np.nan, 0), dtype=np.complex128)
+            values[~null_mask.to_numpy()] = parse_complex(as_text(column[~null_mask]))[0].to_numpy()
+            return pd.Series(values, index=column.index, name=column.name)
+
+        if dtype == 'timedelta64[ns]':
+            return pd.to_timedelta(column, errors='coerce')
+
+        if dtype == 'object':
+            return as_text(column)
+        return column.astype(dtype)
+
+    def read_dtype(self):
+        """
+            Returns the data type pd.read_csv gives the whole column.
+
+            Returns
+            -------
+            str
+                'bool', 'int64', 'float64' or 'object'.
+            """
+        # Only null values: read as float
+        if not self.kinds:
+            return 'float64'
+
+        # Numbers: int unless there is a float or a NaN anywhere
+        if self.kinds <= {'int', 'float'}:
+            return 'float64' if 'float' in self.kinds or self.null_count else 'int64'
+
+        # Only True and False, a NaN makes it object
+        if self.kinds == {'bool'} and not self.null_count:
+            return 'bool'
+
+        return 'object'
+
+
+def column_kind(column):
+    """
+        Returns the kind of data type pd.read_csv gave a column in one chunk.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The column of the chunk.
+
+        Returns
+        -------
+        str
+            'bool', 'int', 'float' or 'text'.
+        """
+    kind = column.dtype.kind
+    if kind == 'b':
+        return 'bool'
+    if kind in 'iu':
+        return 'int'
+    if kind == 'f':
+        return 'float'
+    return 'text'
+
+
+def as_text(column):
+    """
+        Returns the values of a column as they are written in the CSV file.
+
+        Parameters
+        ----------
+        column : pd.Series
+            The column of one chunk.
+
+        Returns
+        -------
+        pd.Series
+            The column itself if it was read as text, otherwise its values as strings (integral floats are
+            written without decimal part), NaN stays NaN.
+        """
+    if column_kind(column) == 'text':
+        return column
+
+    values = column.dropna()
+    if column_kind(column) == 'float' and (values % 1 == 0).all():
+        values = values.astype('int64')
+    return values.astype(str).reindex(column.index)
+
+
+def distinct_key(value):
+    """
+        Returns the key of a value in the distinct set of a ColumnTypeState: its text in the CSV file.
+
+        Parameters
+        ----------
+        value : object
+            A non-null value of the column.
+
+        Returns
+        -------
+        str
+            The text form of the value, integral floats are written without decimal part.
+        """
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def infer_dtypes_streaming(source, chunksize=STREAMING_CHUNK_SIZE, progress=None, **read_csv_kwargs):
+    """
+        Infers the data type of every column of a CSV file without loading the whole file into memory.
+
+        Parameters
+        ----------
+        source : str or file-like object
+            The CSV file, read with pd.read_csv.
+        chunksize : int, optional
+            Number of rows per chunk, peak memory is bounded by the size of one chunk.
+        progress : callable, optional
+            Called with the number of rows read so far, after every chunk.
+        **read_csv_kwargs
+            Extra arguments for pd.read_csv, missing values are recognized while parsing by default
+            (see data_wrangling.missing_value_options).
+
+        Returns
+        -------
+        tuple(dict, dict)
+            The map of column names to data types (the same map infer_and_convert_data_types gives the
+            whole file) and the ColumnTypeState of every column.
+        """
+    states = {}
+    rows = 0
+    read_csv_kwargs = {**missing_value_options(), **read_csv_kwargs}
+    for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+        chunk = data_wrangling(chunk, missing_values_parsed=True)
+        for col in chunk.columns:
+            states.setdefault(col, ColumnTypeState()).update(chunk[col])
+        rows += len(chunk)
+        if progress is not None:
+            progress(rows)
+
+    dtype_map = {col: state.dtype() for col, state in states.items()}
+    return dtype_map, states
+
+
+def write_converted_chunks(source, destination, states, file_format='csv', chunksize=STREAMING_CHUNK_SIZE,
+                           **read_csv_kwargs):
+    """
+        Converts a CSV file chunk by chunk with the data types inferred by infer_dtypes_streaming and writes
+        the result to a CSV, Parquet or Arrow IPC file.
+
+        Parameters
+        ----------
+        source : str or file-like object
+            The CSV file, read with pd.read_csv.
+        destination : str
+            The path of the file to write.
+        states : dict
+            The ColumnTypeState of every column, returned by infer_dtypes_streaming for the same file.
+        file_format : str, optional
+            'csv' (chunks are appended), 'parquet' (one row group per chunk) or 'arrow' (Arrow IPC file, one
+            record batch per chunk, readable with columnar.read_frame).
+        chunksize : int, optional
+            Number of rows per chunk, peak memory is bounded by the size of one chunk.
+        **read_csv_kwargs
+            Extra arguments for pd.read_csv, the same as given to infer_dtypes_streaming.
+
+        Returns
+        -------
+        int
+            The number of rows written.
+       Notes
+       -------
+       Parquet and Arrow have no complex type, complex numbers are written as text (see columnar.frame_to_arrow)
+       float16 columns are written to Parquet as float32 (see columnar.parquet_table)
+        """
+    if file_format not in ('csv', 'parquet', 'arrow'):
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+    rows = 0
+    writer = schema = None
+    read_csv_kwargs = {**missing_value_options(), **read_csv_kwargs}
+    try:
+        for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+            chunk = data_wrangling(chunk, missing_values_parsed=True)
+            chunk = pd.DataFrame({col: states[col].cast(chunk[col]) for col in chunk.columns})
+
+            if file_format == 'csv':
+                chunk.to_csv(destination, mode='a' if rows else 'w', header=not rows, index=False)
+            else:
+                # Every chunk is converted to the schema of the first one
+                table = frame_to_arrow(chunk, schema)
+                if writer is None:
+                    schema = table.schema
+                if file_format == 'parquet':
+                    table = parquet_table(table)
+                if writer is None:
+                    writer = open_arrow_writer(destination, table.schema, file_format)
+                writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rows
+
+
+def open_arrow_writer(destination, schema, file_format):
+    """
+        Opens a writer appending Arrow tables to a Parquet or Arrow IPC file.
+
+        Parameters
+        ----------
+        destination : str
+            The path of the file.
+        schema : pyarrow.Schema
+            The schema of the file.
+        file_format : str
+            'parquet' or 'arrow'.
+
+        Returns
+        -------
+        pyarrow.parquet.ParquetWriter or pyarrow.ipc.RecordBatchFileWriter
+            The writer, to be closed at the end.
+        """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if file_format == 'parquet':
+        return pq.ParquetWriter(destination, schema)
+    return pa.ipc.new_file(destination, schema)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+from django.conf import settings
+
+from csvhandler.artifact_store import ArtifactStore, QuotaExceeded, link_or_copy
+from csvhandler.processor import global_variables
+
+
+class ResultCache(ArtifactStore):
+    """
+    Cache of the results of previous uploads, keyed by the content of the uploaded file.
+
+    The key of an upload is a hash of its bytes and of the inference configuration (see content_key), so the same
+    file uploaded again with the same configuration finds the data type map and the processed file of the first
+    upload without being inferred again. Entries are stored like the artifacts of an upload, one directory per key,
+    and the least recently used entries are evicted when their total size exceeds the quota.
+
+    Args:
+        root (str): The directory holding one sub-directory per entry.
+        ttl (int): Seconds after the last hit before an entry is evicted.
+        quota (int): Maximum total size of all entries in bytes.
+
+    Note:
+        The data type map is always written last, an entry without it is incomplete and is treated as a miss.
+    """
+
+    UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+    def store(self, key, artifacts, dtype_map=None, documents=None):
+        """
+        Add an entry to the cache from existing files, replacing the previous entry with the same key.
+
+        Args:
+            key (str): The key returned by content_key() or header_key().
+            artifacts (dict): The file name of every artifact of the entry mapped to the path of the file to copy.
+            dtype_map (dict, optional): The data type map of the entry.
+            documents (dict, optional): Other JSON artifacts of the entry, file name mapped to the data.
+        """
+        # Entries are never modified, a reader sees the files of the old entry or of the new one, or a miss
+        self.delete(key)
+        self.create(key)
+        for name, source in artifacts.items():
+            with self.open_atomic(key, name) as path:
+                link_or_copy(source, path)
+        for name, data in (documents or {}).items():
+            self.write_json(key, name, data)
+        self.commit(key, dtype_map)
+
+    def commit(self, key, dtype_map=None):
+        """
+        Complete an entry whose artifacts were written with open_atomic(), evicting the least recently used
+        entries if the cache is full.
+
+        Args:
+            key (str): The key returned by content_key() or header_key(), create() must have been called with it.
+            dtype_map (dict, optional): The data type map of the entry.
+
+        Note:
+            An entry larger than the quota on its own is not kept, the request is still answered normally.
+        """
+        self.write_json(key, 'dtype_map.json', dtype_map)
+        try:
+            self.enforce_quota(key)
+        except QuotaExceeded:
+            pass
+
+
+def config_fingerprint():
+    """
+    Hash of the inference configuration in global_variables.py.
+
+    Returns:
+        str: A hex digest that changes whenever one of the settings of global_variables.py changes.
+    """
+    config = {}
+    for name, value in vars(global_variables).items():
+        if name.isupper():
+            # The iteration order of a set changes from one process to another
+            config[name] = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def content_key(file, namespace):
+    """
+    Cache key of an uploaded file, computed while reading it chunk by chunk.
+
+    Args:
+        file (UploadedFile): The uploaded file, rewound afterwards.
+        namespace (str): The view using the key (e.g. "types"), views caching different artifacts never share entries.
+
+    Returns:
+        str: A SHA-256 hex digest of the namespace, the inference configuration and the bytes of the file.
+    """
+    digest = hashlib.sha256()
+    digest.update(namespace.encode())
+    digest.update(config_fingerprint().encode())
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def header_key(columns, namespace='header'):
+    """
+    Cache key of the latest upload with a given header, whatever its content (see column_fingerprints).
+
+    Args:
+        columns (list): The column names of the upload.
+        namespace (str, optional): The processing options the converted columns depend on, uploads processed
+                                   with other options never share their columns.
+
+    Returns:
+        str: A SHA-256 hex digest of the namespace, the inference configuration and the column names.
+    """
+    digest = hashlib.sha256(namespace.encode())
+    digest.update(config_fingerprint().encode())
+    digest.update(json.dumps([str(col) for col in columns]).encode())
+    return digest.hexdigest()
+
+
+def column_fingerprints(df):
+    """
+    Fingerprint of the content of every column of an upload, as read by pd.read_csv.
+
+    A column keeps its fingerprint as long as its values do not change, whatever happens to the other columns,
+    so its data type decision and converted values can be reused from a previous upload with the same header.
+
+    Args:
+        df (pd.DataFrame): The upload, before any wrangling.
+
+    Returns:
+        dict: The column names mapped to a hex digest of their data type and values.
+    """
+    fingerprints = {}
+    for col in df.columns:
+        digest = hashlib.sha256(str(df[col].dtype).encode())
+        digest.update(pd.util.hash_pandas_object(df[col], index=False).to_numpy().tobytes())
+        fingerprints[col] = digest.hexdigest()
+    return fingerprints
+
+
+def get_result_cache():
+    """
+    Create the result cache configured in the Django settings.
+
+    Returns:
+        ResultCache: The cache using CSV_RESULT_CACHE_ROOT, CSV_RESULT_CACHE_TTL_SECONDS and CSV_RESULT_CACHE_QUOTA_BYTES.
+    """
+    return ResultCache(
+        root=getattr(settings, 'CSV_RESULT_CACHE_ROOT', os.path.join('csvhandler', 'files', 'cache')),
+        ttl=getattr(settings, 'CSV_RESULT_CACHE_TTL_SECONDS', 7 * 24 * 60 * 60),
+        quota=getattr(settings, 'CSV_RESULT_CACHE_QUOTA_BYTES', 1024 ** 3),
+    )
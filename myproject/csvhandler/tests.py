@@ -1,20 +1,517 @@
-# import os
-# import django
-# from django.db.models import QuerySet
-#
-# # Set the Django environment variables
-# os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.myproject.settings')  # replace to settings path
-# django.setup()  # initialize Django evn
-#
-#
-# from django.test import TestCase
-# from csvhandler.models import Student
-#
-# # Create your tests here.
-# if __name__ == '__main__':
-#     all_samples: QuerySet[Student] = Student.objects.all()
-#     samples = Student.objects.filter(gender=1)
-#     for student in all_samples:
-#         print(student.name)
-#
-#     print(all_samples)
\ No newline at end of file
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from csvhandler import jobs
+from csvhandler.artifact_store import ArtifactStore, ArtifactNotFound, QuotaExceeded, get_artifact_store
+from csvhandler.processor import parallel
+from csvhandler.processor.column_profile import ColumnProfile
+from csvhandler.processor.columnar import read_frame
+from csvhandler.processor.data_wrangling import missing_value_options
+from csvhandler.processor.main import CONVERTERS, infer_and_convert_data_types, infer_column_data_type
+from csvhandler.processor.registry import ConverterRegistry
+from csvhandler.processor.sketch import DistinctSketch
+from csvhandler.processor.streaming import infer_dtypes_streaming, write_converted_chunks
+from csvhandler.result_cache import content_key, get_result_cache, header_key
+
+
+def in_memory_dtypes(csv):
+    """The data types infer_and_convert_data_types gives a CSV file read as a whole, as strings."""
+    df = infer_and_convert_data_types(pd.read_csv(io.StringIO(csv), **missing_value_options()))
+    return {col: str(dtype) for col, dtype in df.dtypes.items()}
+
+
+class StoreTestCase(SimpleTestCase):
+    """
+    Test case whose artifact store and result cache live in temporary directories, deleted after every test.
+    """
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(CSV_ARTIFACT_ROOT=f'{root}/uploads', CSV_RESULT_CACHE_ROOT=f'{root}/cache')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, content, **data):
+        """
+        Post a CSV file to types/.
+
+        Args:
+            content (bytes): The CSV file.
+            **data: The other fields of the request (e.g. stream="true").
+
+        Returns:
+            HttpResponse: The response of types/.
+        """
+        file = SimpleUploadedFile('data.csv', content, content_type='text/csv')
+        return self.client.post(reverse('csv-types'), {'file': file, **data})
+
+    def save_types(self, upload_id, types, **data):
+        """
+        Post user-friendly data types to save-types/ and read the whole download.
+
+        Args:
+            upload_id (str): The upload ID returned by types/.
+            types (dict): The column names mapped to user-friendly data types.
+            **data: The other fields of the request (e.g. format="parquet").
+
+        Returns:
+            bytes: The downloaded file.
+        """
+        response = self.client.post(reverse('csv-save'),
+                                    {'data': json.dumps(types), 'upload_id': upload_id, **data})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+
+class SaveTypesTests(StoreTestCase):
+    CSV = b'count,label,flag\n1,x,True\n2,y,\n3,z,False\n4,x,True\n'
+
+    def test_save_then_revert(self):
+        response = self.upload(self.CSV)
+        upload_id = response['X-Upload-ID']
+        types = response.json()
+        self.assertEqual(types['count'], 'Integer8')
+        self.assertEqual(types['flag'], 'Boolean')
+
+        self.save_types(upload_id, {**types, 'count': 'Decimal64', 'flag': 'Text'})
+        path = get_artifact_store().path(upload_id, 'output.arrow')
+        self.assertEqual(str(read_frame(path)['count'].dtype), 'float64')
+
+        # The saved types are the new reference, saving the first ones converts back
+        self.save_types(upload_id, types)
+        df = read_frame(path)
+        self.assertEqual(str(df['count'].dtype), 'Int8')
+        self.assertEqual(get_artifact_store().read_json(upload_id, 'dtype_map.json')['count'], 'Int8')
+        self.assertEqual(df['flag'].tolist(), [True, pd.NA, False, True])
+
+
+class StreamingTests(SimpleTestCase):
+    CHUNK_SIZES = (1, 7, 1000)
+
+    def assertStreamedLikeInMemory(self, csv):
+        expected = in_memory_dtypes(csv)
+        for chunksize in self.CHUNK_SIZES:
+            with self.subTest(chunksize=chunksize):
+                dtype_map, _ = infer_dtypes_streaming(io.StringIO(csv), chunksize=chunksize)
+                self.assertEqual(dtype_map, expected)
+
+    def test_mixed_columns(self):
+        rows = 60
+        df = pd.DataFrame({
+            'small_int': np.arange(rows) % 100,
+            'big_int': np.arange(rows) * 10 ** 6,
+            'negative': -np.arange(rows),
+            'half': np.arange(rows) * 0.25,
+            'ratio': np.arange(rows) / 7,
+            'flag': ['yes', 'no'] * (rows // 2),
+            'state': ['idle', 'busy', 'down'] * (rows // 3),
+            'date': pd.date_range('2020-01-01', periods=rows).strftime('%Y-%m-%d'),
+            'gaps': [None if position % 5 else position for position in range(rows)],
+            'text': [f'item {position}' for position in range(rows)],
+            'complex': [f'{position}+1j' for position in range(rows)],
+            'numbers_then_text': [str(position) for position in range(rows - 1)] + ['x'],
+        })
+        self.assertStreamedLikeInMemory(df.to_csv(index=False))
+
+    def test_float64_category(self):
+        # Unchanged by the float converter, so 3 distinct values make it a category
+        values = [1e300, 2e300, 3e300] * 10
+        self.assertStreamedLikeInMemory('value\n' + '\n'.join(map(repr, values)) + '\n')
+
+    def test_true_and_missing_values(self):
+        # read_csv gives chunks of only True a bool type, the whole column is object
+        rows = [f'{position},True' if position % 2 else f'{position},' for position in range(20)]
+        self.assertStreamedLikeInMemory('row,flag\n' + '\n'.join(rows) + '\n')
+
+    def test_integer_limits(self):
+        # The biggest values of int64 and uint64, a float with a missing value beyond 2 ** 53 is not converted
+        rows = [f'{2 ** 63 - 1},{2 ** 63},{2 ** 64 - 1},{2 ** 53 + 2}']
+        rows += [f'{value},{value},{value},{value if value else ""}' for value in range(5)]
+        csv = 'signed,unsigned,widest,gaps\n' + '\n'.join(rows) + '\n'
+        self.assertStreamedLikeInMemory(csv)
+
+        df = infer_and_convert_data_types(pd.read_csv(io.StringIO(csv), **missing_value_options()))
+        self.assertEqual({col: str(dtype) for col, dtype in df.dtypes.items()},
+                         {'signed': 'Int64', 'unsigned': 'UInt64', 'widest': 'UInt64', 'gaps': 'float64'})
+        first_row = [df[col].iloc[0] for col in ('signed', 'unsigned', 'widest')]
+        self.assertEqual(first_row, [2 ** 63 - 1, 2 ** 63, 2 ** 64 - 1])
+
+    def test_converted_chunks(self):
+        df = pd.DataFrame({'count': range(50), 'state': ['a', 'b', 'c', 'd', 'e'] * 10,
+                           'value': np.arange(50) * 0.5})
+        csv = df.to_csv(index=False)
+        _, states = infer_dtypes_streaming(io.StringIO(csv), chunksize=7)
+        expected = infer_and_convert_data_types(pd.read_csv(io.StringIO(csv), **missing_value_options()))
+
+        with tempfile.TemporaryDirectory() as directory:
+            destination = os.path.join(directory, 'output.arrow')
+            rows = write_converted_chunks(io.StringIO(csv), destination, states, file_format='arrow', chunksize=7)
+            self.assertEqual(rows, 50)
+            pd.testing.assert_frame_equal(read_frame(destination), expected)
+
+    def test_sketch_merge(self):
+        values = pd.Series([f'value {position}' for position in range(20000)], dtype=object)
+        whole = DistinctSketch(5)
+        whole.add(values.unique(), values, overflow=True)
+        first, second = DistinctSketch(5), DistinctSketch(5)
+        first.add(values[:3].unique(), values[:3])
+        second.add(values[3:].unique(), values[3:], overflow=True)
+
+        self.assertEqual(first.count(), 3)
+        self.assertEqual(first.merge(second).count(), whole.count())
+        self.assertAlmostEqual(whole.count() / len(values), 1, delta=0.05)
+
+
+class TypesCacheTests(StoreTestCase):
+    CSV = b'count,label\n1,x\n2,y\n3,z\n4,x\n'
+
+    def test_stream_mode_in_key(self):
+        in_memory = self.upload(self.CSV, detail='true').json()
+        self.assertNotIn('distinct_values', in_memory['details']['label'])
+
+        # Not the cached result of the in-memory upload, a streamed file counts its distinct values
+        streamed = self.upload(self.CSV, detail='true', stream='true').json()
+        self.assertEqual(streamed['types'], in_memory['types'])
+        self.assertEqual(streamed['details']['label']['distinct_values'], 3)
+
+
+class JobTests(StoreTestCase):
+    CSV = b'count,label\n1,x\n2,y\n3,z\n4,x\n'
+
+    def setUp(self):
+        super().setUp()
+        # The options of the default backend stay, the inline backend ignores them
+        settings = override_settings(CSV_JOB_QUEUE_BACKEND='csvhandler.jobs.InlineJobQueue',
+                                     CSV_JOB_QUEUE_OPTIONS={'workers': 2})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        jobs._job_queue = None
+        self.addCleanup(setattr, jobs, '_job_queue', None)
+
+    def test_job_status(self):
+        response = self.upload(self.CSV, **{'async': 'true'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job_id']
+        self.assertEqual(response['Location'], reverse('csv-job', args=[job_id]))
+
+        job = self.client.get(response['Location'], {'detail': 'true'}).json()
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual((job['rows'], job['columns'], job['total_columns']), (4, 2, 2))
+        self.assertEqual(job['types'], self.upload(self.CSV).json())
+        self.assertIn('label', job['details'])
+
+    def test_unknown_job(self):
+        response = self.client.get(reverse('csv-job', args=['0' * 32]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_abstract_queue(self):
+        with self.assertRaises(TypeError):
+            jobs.JobQueue()
+
+
+class ConverterRegistryTests(SimpleTestCase):
+    def copy_converters(self):
+        """A registry with the converters of main.CONVERTERS and fresh counters."""
+        registry = ConverterRegistry()
+        for converter in CONVERTERS.converters.values():
+            registry.register(converter.name, converter.function, converter.guard, converter.cost, converter.after)
+        return registry
+
+    def test_order_follows_hit_rate(self):
+        registry = self.copy_converters()
+        names = [converter.name for converter in registry.ordered()]
+        self.assertEqual(names, ['bool', 'int', 'float', 'datetime', 'category', 'complex', 'timedelta'])
+
+        # Columns of durations: timedelta converted all of them, it now comes before complex, which costs as much
+        for offset in range(10):
+            column = pd.Series([f'{offset + position} days' for position in range(20)], dtype=object)
+            converted_col = registry.convert(column, ColumnProfile(column))
+            pd.testing.assert_series_equal(converted_col, infer_column_data_type(column))
+        names = [converter.name for converter in registry.ordered()]
+        self.assertEqual(names, ['bool', 'int', 'float', 'datetime', 'category', 'timedelta', 'complex'])
+
+    def test_concurrent_counters(self):
+        registry = self.copy_converters()
+        column = pd.Series([str(position) for position in range(20)], dtype=object)
+
+        def convert():
+            for _ in range(50):
+                registry.convert(column, ColumnProfile(column))
+
+        threads = [threading.Thread(target=convert) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((registry['int'].attempts, registry['int'].hits), (200, 200))
+
+
+def exit_worker(*args):
+    """Task killing the worker process that runs it."""
+    os._exit(1)
+
+
+class ParallelInferenceTests(SimpleTestCase):
+    def test_pool_size(self):
+        executor = parallel.get_executor(1)
+        self.addCleanup(parallel.reset_executor, executor)
+        self.assertEqual(executor._max_workers, 1)
+        self.assertIs(parallel.get_executor(1), executor)
+
+    def test_broken_pool(self):
+        df = pd.DataFrame({'count': range(30), 'state': ['a', 'b', 'c'] * 10, 'value': np.arange(30) * 0.5})
+        expected = [infer_column_data_type(df[col]) for col in df.columns]
+
+        # A worker dies: the pool is replaced and the columns are inferred in this process
+        broken = parallel.get_executor(1)
+        self.addCleanup(parallel.reset_executor, broken)
+        with self.assertRaises(BrokenProcessPool):
+            broken.submit(exit_worker).result()
+        converted_cols = parallel.infer_columns_parallel(df, max_workers=1)
+        for converted_col, expected_col in zip(converted_cols, expected):
+            pd.testing.assert_series_equal(converted_col, expected_col)
+
+        executor = parallel.get_executor(1)
+        self.addCleanup(parallel.reset_executor, executor)
+        self.assertIsNot(executor, broken)
+
+
+class SparseTests(StoreTestCase):
+    def test_sparse_columns(self):
+        values = [f'{position},{position}.5,item {position}' for position in range(5)]
+        rows = ['count,value,label'] + [',,'] * 195 + values
+        types = self.upload('\n'.join(rows).encode() + b'\n', sparse='true').json()
+
+        # Integer columns stay dense, a sparse column would give their values back as floats
+        self.assertEqual(types, {'count': 'Integer8', 'value': 'Sparse[Decimal64]', 'label': 'Sparse[Text]'})
+
+
+class BooleanTests(StoreTestCase):
+    CSV = b'row,flag,letter\n1,True,T\n2,,F\n3,False,F\n4,True,T\n'
+
+    def test_values(self):
+        for stream in ('false', 'true'):
+            with self.subTest(stream=stream):
+                response = self.upload(self.CSV, stream=stream)
+                self.assertEqual(response.json(), {'row': 'Integer8', 'flag': 'Boolean', 'letter': 'Boolean'})
+
+                # The missing value stays missing, the other values keep their meaning
+                df = read_frame(get_artifact_store().path(response['X-Upload-ID'], 'output.arrow'))
+                self.assertEqual(df['flag'].tolist(), [True, pd.NA, False, True])
+                self.assertEqual(df['letter'].tolist(), [True, False, False, True])
+
+
+class ArrowParsingTests(StoreTestCase):
+    def test_same_types_as_c_parser(self):
+        rows = ['count,gaps,ratio,flag,label,wide,huge']
+        for position in range(6):
+            gap = position if position % 3 else ''
+            # Beyond int64 with a blank, pd.read_csv keeps the column as text
+            wide = {0: 2 ** 64 - 1, 1: ''}.get(position, position)
+            huge = 2 ** 64 + position
+            rows.append(f'{position},{gap},{position / 4},{position % 2 == 0},item {position},{wide},{huge}')
+        csv = '\n'.join(rows).encode() + b'\n'
+
+        types = self.upload(csv, engine='c').json()
+        self.assertEqual(self.upload(csv, engine='arrow').json(), types)
+        self.assertEqual(types['wide'], 'Text')
+
+
+class ConverterTests(SimpleTestCase):
+    def test_data_types(self):
+        df = pd.DataFrame({
+            'flag': ['yes', 'no', 'yes', 'no', 'yes', 'no'],
+            'small': [-3, -2, -1, 0, 1, 2],
+            'byte': [0, 50, 100, 150, 200, 255],
+            'big': [0, 1, 2, 3, 4, 2 ** 40],
+            'gaps': [1, None, 3, 4, 5, 6],
+            'half': [0.5, 1.25, 2.5, 3.75, 5.5, 6.25],
+            'tenth': [0.1, 0.2, 0.3, 0.4, 0.5, 0.6],
+            'date': ['2020-01-01', '2020-02-01', '2020-03-01', '2021-01-01', '2022-01-01', '2023-01-01'],
+            'state': ['a', 'b', 'c', 'a', 'b', 'c'],
+            'complex': ['1+2j', '3-1j', '2j', '5+0j', '1.5+1j', '-1-1j'],
+            'delta': ['1 days', '2 days', '3 hours', '4 days', '5 minutes', '6 days'],
+            'text': ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta'],
+        })
+        converted = infer_and_convert_data_types(df.copy())
+
+        self.assertEqual({col: str(dtype) for col, dtype in converted.dtypes.items()}, {
+            'flag': 'bool', 'small': 'Int8', 'byte': 'UInt8', 'big': 'Int64', 'gaps': 'Int8', 'half': 'float16',
+            'tenth': 'float32', 'date': 'datetime64[ns]', 'state': 'category', 'complex': 'complex128',
+            'delta': 'timedelta64[ns]', 'text': 'object',
+        })
+        self.assertEqual(converted['gaps'].tolist(), [1, pd.NA, 3, 4, 5, 6])
+        self.assertEqual(converted['big'].max(), 2 ** 40)
+        self.assertEqual(converted['date'].iloc[3], pd.Timestamp('2021-01-01'))
+        self.assertEqual(converted['complex'].tolist(), [1 + 2j, 3 - 1j, 2j, 5 + 0j, 1.5 + 1j, -1 - 1j])
+        self.assertEqual(converted['delta'].iloc[2], pd.Timedelta(hours=3))
+        self.assertEqual(converted['delta'].iloc[4], pd.Timedelta(minutes=5))
+
+    def test_no_conversion(self):
+        df = pd.DataFrame({'mixed': ['1', 'x', '2020-01-01', '3', '1+2j', 'y'],
+                           'partial_dates': ['2020-01-01', 'not a date', '2020-01-03', 'x', 'y', 'z']})
+        converted = infer_and_convert_data_types(df.copy())
+        self.assertEqual(converted.dtypes.astype(str).tolist(), ['object', 'object'])
+        pd.testing.assert_frame_equal(converted, df)
+
+
+class ArtifactStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def write(self, store, upload_id, size):
+        with store.open_atomic(upload_id, 'output.arrow') as path:
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+
+    def test_expired_uploads(self):
+        store = ArtifactStore(self.root, ttl=60, quota=10 ** 6)
+        old_id = store.create()
+        store.write_json(old_id, 'dtype_map.json', {'count': 'Int8'})
+        accessed = time.time() - 120
+        os.utime(store.directory(old_id), (accessed, accessed))
+
+        new_id = store.create()
+        self.assertEqual([upload[0] for upload in store.uploads()], [new_id])
+        with self.assertRaises(ArtifactNotFound):
+            store.read_json(old_id, 'dtype_map.json')
+
+    def test_quota(self):
+        store = ArtifactStore(self.root, ttl=60, quota=250)
+        first_id, second_id = store.create(), store.create()
+        self.write(store, first_id, 100)
+        self.write(store, second_id, 100)
+        accessed = time.time() - 10
+        os.utime(store.directory(first_id), (accessed, accessed))
+
+        # The least recently used upload is evicted first
+        third_id = store.create()
+        self.write(store, third_id, 100)
+        store.enforce_quota(third_id)
+        self.assertEqual({upload[0] for upload in store.uploads()}, {second_id, third_id})
+
+        # An upload larger than the quota on its own is not kept
+        big_id = store.create()
+        self.write(store, big_id, 300)
+        with self.assertRaises(QuotaExceeded):
+            store.enforce_quota(big_id)
+        self.assertNotIn(big_id, [upload[0] for upload in store.uploads()])
+
+    def test_unknown_upload(self):
+        store = ArtifactStore(self.root, ttl=60, quota=10 ** 6)
+        with self.assertRaises(ArtifactNotFound):
+            store.path('../outside', 'dtype_map.json')
+
+
+class ResultCacheTests(StoreTestCase):
+    CSV = b'count,state,value\n' + b''.join(f'{row},{"abc"[row % 3]},{row}.25\n'.encode() for row in range(30))
+
+    def test_content_key(self):
+        def key(content, namespace='types'):
+            return content_key(SimpleUploadedFile('data.csv', content), namespace)
+
+        self.assertEqual(key(self.CSV), key(self.CSV))
+        self.assertNotEqual(key(self.CSV), key(self.CSV + b'30,a,30.25\n'))
+        self.assertNotEqual(key(self.CSV), key(self.CSV, 'upload'))
+        self.assertEqual(header_key(['count', 'state']), header_key(['count', 'state']))
+        self.assertNotEqual(header_key(['count', 'state']), header_key(['state', 'count']))
+
+    def test_incomplete_entry(self):
+        cache = get_result_cache()
+        key = content_key(SimpleUploadedFile('data.csv', self.CSV), 'types')
+        cache.create(key)
+        with cache.open_atomic(key, 'output.arrow') as path:
+            open(path, 'wb').close()
+
+        # Without its data type map the entry is a miss
+        with self.assertRaises(ArtifactNotFound):
+            cache.read_json(key, 'dtype_map.json')
+        cache.commit(key, {'count': 'Int8'})
+        self.assertEqual(cache.read_json(key, 'dtype_map.json'), {'count': 'Int8'})
+
+    def test_repeated_upload(self):
+        first = self.upload(self.CSV, detail='true')
+        second = self.upload(self.CSV, detail='true')
+        self.assertNotEqual(first['X-Upload-ID'], second['X-Upload-ID'])
+        self.assertEqual(second.json(), first.json())
+
+    def test_modified_upload(self):
+        first = self.upload(self.CSV, detail='true').json()
+        modified = self.upload(self.CSV.replace(b'29,c,29.25', b'29,c,99.75'), detail='true').json()
+        self.assertEqual(modified['types'], first['types'])
+
+        # Only the modified column is inferred again, the others are reused without any detail
+        self.assertEqual(modified['details']['count'], {})
+        self.assertEqual(modified['details']['state'], {})
+        self.assertNotEqual(modified['details']['value'], {})
+
+
+class DownloadTests(StoreTestCase):
+    CSV = b'count,state,value\n' + b''.join(f'{row},{"abc"[row % 3]},{row}.25\n'.encode() for row in range(30))
+
+    def download(self, **data):
+        file = SimpleUploadedFile('data.csv', self.CSV, content_type='text/csv')
+        response = self.client.post(reverse('csv-upload'), {'file': file, **data})
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def assertTyped(self, df, value_dtype='float16'):
+        self.assertEqual({col: str(dtype) for col, dtype in df.dtypes.items()},
+                         {'count': 'Int8', 'state': 'category', 'value': value_dtype})
+        self.assertEqual(df['count'].tolist(), list(range(30)))
+        self.assertEqual(df['value'].iloc[-1], 29.25)
+
+    def test_csv(self):
+        response, content = self.download()
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="processed_file.csv"')
+        pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(content)), pd.read_csv(io.BytesIO(self.CSV)))
+
+    def test_parquet(self):
+        for compression in ('snappy', 'zstd', 'none'):
+            with self.subTest(compression=compression):
+                _, content = self.download(format='parquet', compression=compression)
+                # Parquet has no float16, it is stored as float32
+                self.assertTyped(pd.read_parquet(io.BytesIO(content)), 'float32')
+
+    def test_feather(self):
+        for compression in ('lz4', 'zstd', 'none'):
+            with self.subTest(compression=compression):
+                _, content = self.download(format='feather', compression=compression)
+                self.assertTyped(pd.read_feather(io.BytesIO(content)))
+
+    def test_arrow_stream(self):
+        response, content = self.download(format='arrow')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="processed_file.arrows"')
+        self.assertTyped(pa.ipc.open_stream(content).read_pandas())
+
+    def test_unsupported_format(self):
+        file = SimpleUploadedFile('data.csv', self.CSV, content_type='text/csv')
+        response = self.client.post(reverse('csv-upload'), {'file': file, 'format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_save_types(self):
+        response = self.upload(self.CSV)
+        types = {**response.json(), 'count': 'Integer16'}
+        content = self.save_types(response['X-Upload-ID'], types)
+        self.assertEqual(pd.read_csv(io.BytesIO(content))['count'].tolist(), list(range(30)))
+
+    def test_save_types_formats(self):
+        response = self.upload(self.CSV)
+        types = {**response.json(), 'count': 'Integer16'}
+        content = self.save_types(response['X-Upload-ID'], types, format='feather')
+        self.assertEqual(str(pd.read_feather(io.BytesIO(content))['count'].dtype), 'Int16')
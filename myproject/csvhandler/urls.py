@@ -1,9 +1,10 @@
 # csvhandler/urls.py
 from django.urls import path
-from .views import CSVUploadView, CSVTypesView, CSVSaveViewAndDownload
+from .views import CSVUploadView, CSVTypesView, CSVSaveViewAndDownload, CSVJobStatusView
 
 urlpatterns = [
     path('upload/', CSVUploadView.as_view(), name='csv-upload'),
     path('types/', CSVTypesView.as_view(), name='csv-types'),
     path('save-types/', CSVSaveViewAndDownload().as_view(), name='csv-save'),
+    path('jobs/<str:job_id>/', CSVJobStatusView.as_view(), name='csv-job'),
 ]
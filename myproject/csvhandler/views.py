@@ -1,19 +1,66 @@
 # Create your views here.
 # csvhandler/views.py
+import hashlib
 import json
+import os
+from functools import partial
 from csvhandler.processor.forced_data_conversion import forced_to_bool
 from csvhandler.processor.main import infer_and_convert_data_types
+from csvhandler.processor.global_variables import STREAMING_MIN_BYTES, ARROW_PARSING, SAMPLED_INFERENCE, \
+    COST_BASED_REPRESENTATION, SPARSE_INFERENCE
+from csvhandler.processor.arrow_parsing import read_csv_arrow
+from csvhandler.processor.data_wrangling import missing_value_options
+from csvhandler.processor.streaming import infer_dtypes_streaming, write_converted_chunks
+from csvhandler.processor.columnar import write_frame, read_frame, iter_frames
+from csvhandler.downloads import download_chunks, frame_batches, download_batch_rows, download_format, \
+    download_name, download_content_type, DownloadFormatError
+from csvhandler.artifact_store import get_artifact_store, ArtifactNotFound, QuotaExceeded
+from csvhandler.result_cache import get_result_cache, content_key, header_key, column_fingerprints
+from csvhandler.jobs import get_job_queue, JobProgress
 import pandas as pd
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.http import HttpResponse, JsonResponse
-import io
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from csvhandler.process_functions import map_user_friendly_names_to_dtypes, get_differences
-from csvhandler.process_functions import map_dtypes_to_user_friendly_names
+from csvhandler.process_functions import map_dtypes_to_user_friendly_names, get_column_details
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 
 
+def parsing_engine(data):
+    """
+    Read the CSV parser requested by the client.
+
+    Args:
+        data (dict): The request data, with an optional "engine" ("arrow" or "c", ARROW_PARSING by default).
+
+    Returns:
+        str: "arrow" to read the file with read_csv_arrow, "c" to read it with pd.read_csv.
+    """
+    engine = data.get('engine')
+    if engine in ('arrow', 'c'):
+        return engine
+    return 'arrow' if ARROW_PARSING else 'c'
+
+
+def read_csv(source, engine):
+    """
+    Read an uploaded CSV file as a whole with the given parser.
+
+    Args:
+        source (str or file-like object): The CSV file.
+        engine (str): "arrow" or "c" (see parsing_engine).
+
+    Returns:
+        pd.DataFrame: The DataFrame, text columns are Arrow-backed strings with the Arrow parser. Every
+                      representation of a missing value is already NaN (see missing_value_options).
+    """
+    if engine == 'arrow':
+        return read_csv_arrow(source)
+    return pd.read_csv(source, **missing_value_options())
+
+
 """
 CSVUploadView: Django APIView to handle the upload of a CSV file, process its data types, 
 and allow the user to download the processed CSV file.
@@ -28,10 +75,19 @@ Key Functionalities:
 - Accept an uploaded CSV file from the client.
 - Process the CSV file to infer and convert data types using a custom function.
 - Convert the processed DataFrame back into a CSV file.
-- Return the processed CSV file as a downloadable HTTP response.
+- Return the processed CSV file as a downloadable HTTP response, streamed and encoded in batches of
+  CSV_DOWNLOAD_BATCH_ROWS rows (see downloads.csv_chunks).
+- Return Parquet, Feather or an Arrow IPC stream instead with the "format" field ("csv", "parquet", "feather"
+  or "arrow") and the optional "compression" field, the inferred data types are kept in the file schema.
+- Keep the processed file in the result cache (see result_cache.ResultCache), the same file uploaded again
+  with the same configuration is returned without being processed again.
+- Read the file with the multithreaded Arrow CSV reader with engine=arrow (or ARROW_PARSING), text columns then
+  stay Arrow-backed strings (see processor.arrow_parsing.read_csv_arrow).
 
 Returns:
-- A CSV file (processed_data) for download in the response with the filename "processed_file.csv".
+- A CSV file (processed_data) for download in the response with the filename "processed_file.csv" (or 
+"processed_file.parquet", "processed_file.feather" or "processed_file.arrows" in the other formats).
+- 400 if the format or compression is not supported.
 
 Note:
 - This functionality is currently not used in the active workflow but remains operational for file processing and download.
@@ -47,20 +103,51 @@ class CSVUploadView(APIView):
     def post(self, request, *args, **kwargs):
         # Receive and process the uploaded file
         file = request.FILES['file']
-        df = pd.read_csv(file)
+
+        # The format of the processed file (CSV by default)
+        try:
+            file_format, compression = download_format(request.data)
+        except DownloadFormatError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        name = download_name('processed_file', file_format)
+        content_type = download_content_type(file_format)
+
+        # The CSV parser (pandas C parser by default)
+        engine = parsing_engine(request.data)
+
+        # The same file may have been processed already, in the same format
+        cache = get_result_cache()
+        key = content_key(file, f"upload:{engine}:{file_format}:{compression}")
+        try:
+            cache.read_json(key, 'dtype_map.json')
+            response = FileResponse(open(cache.path(key, name), 'rb'), content_type=content_type)
+        except (ArtifactNotFound, FileNotFoundError):
+            # Return the file as a streamed HTTP response, it is never held in memory as a whole
+            chunks = self.process(file, cache, key, name, file_format, compression, engine)
+            response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+        return response
+
+    def process(self, file, cache, key, name, file_format, compression, engine='c'):
+        df = read_csv(file, engine)
 
         # Use a custom processing function to process the DataFrame
-        processed_data = infer_and_convert_data_types(df)
+        processed_data = infer_and_convert_data_types(df, missing_values_parsed=True)
 
-        # Convert the processed DataFrame back to CSV format
-        buffer = io.StringIO()
-        processed_data.to_csv(buffer, index=False)
-        buffer.seek(0)
+        # Converted batch by batch while it is sent
+        return self.encode_and_cache(processed_data, cache, key, name, file_format, compression)
 
-        # Return the CSV file as an HTTP response
-        response = HttpResponse(buffer, content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="processed_file.csv"'
-        return response
+    def encode_and_cache(self, processed_data, cache, key, name, file_format, compression):
+        batches = partial(frame_batches, processed_data, download_batch_rows())
+
+        # Keep the result for the next upload of the same file, only once it was completely sent
+        cache.create(key)
+        with cache.open_atomic(key, name) as path:
+            with open(path, 'wb') as f:
+                for chunk in download_chunks(batches, file_format, compression):
+                    f.write(chunk)
+                    yield chunk
+        cache.commit(key, {col: str(dtype) for col, dtype in processed_data.dtypes.items()})
 
 """
 CSVTypesView: Django APIView to process an uploaded CSV file, infer and store data types, 
@@ -76,13 +163,42 @@ dict in a user-friendly format to the front-end as a JSON response.
 Key Functionalities:
 - Accept a CSV file upload from the client.
 - Infer and convert column data types using a custom function.
-- Save the processed data as a CSV file on the server.
+- Save the processed data as a typed columnar file (Arrow IPC) on the server.
 - Create and save a JSON file representing the dict of column names to data types.
 - Convert inferred data types to user-friendly names for front-end display.
 - Return the user-friendly data type dict as a JSON response.
+- Stream files of at least STREAMING_MIN_BYTES bytes (or when the request has stream=true) chunk by chunk,
+  so memory is bounded by the chunk size instead of the file size.
+- Store the processed data and the data type dict under a new upload ID (see artifact_store.ArtifactStore),
+  so concurrent uploads never overwrite each other.
+- Keep the results in the result cache (see result_cache.ResultCache): the same file uploaded again with the
+  same configuration gets the cached data type dict and processed data without being inferred again.
+  A modified file with the same header as a previous upload only has its modified columns inferred again,
+  the other ones are taken from the previous upload (see result_cache.column_fingerprints).
+- Read files loaded as a whole with the multithreaded Arrow CSV reader with engine=arrow (or ARROW_PARSING), text
+  columns then stay Arrow-backed strings (see processor.arrow_parsing.read_csv_arrow). Streamed files are always
+  read with the pandas C parser.
+- With async=true, save the file and process it in a background job (see jobs.JobQueue) instead of inside the
+  request, the response (202) only holds the job ID to poll at /jobs/<job_id>/ (see CSVJobStatusView).
+- With sampled=true (or SAMPLED_INFERENCE), choose the data type of every column of a big file on a sample of
+  its rows and verify it with one pass over the whole column (see processor.main.infer_column_sampled).
+- With optimize_memory=true (or COST_BASED_REPRESENTATION), store every column kept as text as Python strings,
+  categorical codes or Arrow strings, whichever is estimated to take the least memory (see
+  processor.representation.choose_representation). Streamed files keep their text columns as Python strings.
+- With sparse=true (or SPARSE_INFERENCE), store every column with more than SPARSE_NULL_RATIO of missing values as
+  a pandas Sparse column over its inferred data type, e.g. "Sparse[Decimal32]" (see
+  processor.representation.sparse_column). Streamed files are never sparse.
+- With detail=true, also return how every column was processed: the sample size and the number of rows that
+  contradicted the sample (counterexamples), the cells modified by the cleaning, the converters skipped and the
+  representation chosen for a text column with its estimated memory and savings in bytes, the share of values a
+  sparse column keeps (sparse_density). A streamed file gives
+  the number of distinct values of every column instead, exact up to a few and estimated beyond (see
+  processor.sketch.DistinctSketch).
 
 Returns:
 - A JSON object containing a dict of column names to user-friendly data types.
+- With detail=true, a JSON object with this dict in "types" and the details of every column in "details".
+- The upload ID in the "X-Upload-ID" header, to be sent back to /save-types/.
 
 Example Usage:
 - A user uploads a CSV file, and the back-end processes the file to infer and convert data types.
@@ -95,26 +211,235 @@ class CSVTypesView(APIView):
     def post(self, request, *args, **kwargs):
         # Receive and process the uploaded file
         file = request.FILES['file']
-        df = pd.read_csv(file)
+
+        # Every upload gets its own artifacts
+        store = get_artifact_store()
+        upload_id = store.create()
+
+        # Big files are never loaded as a whole
+        stream = file.size >= STREAMING_MIN_BYTES or request.data.get('stream') in ('true', '1')
+
+        # The CSV parser of the files loaded as a whole (pandas C parser by default)
+        engine = 'c' if stream else parsing_engine(request.data)
+
+        # Data types chosen on a sample of the rows and verified on the whole file
+        sampled = request.data.get('sampled', str(SAMPLED_INFERENCE).lower()) in ('true', '1')
+
+        # Text columns stored in the representation with the least memory
+        optimize_memory = not stream and request.data.get(
+            'optimize_memory', str(COST_BASED_REPRESENTATION).lower()) in ('true', '1')
+
+        # Columns made mostly of missing values stored as Sparse columns
+        sparse = not stream and request.data.get('sparse', str(SPARSE_INFERENCE).lower()) in ('true', '1')
+
+        # Results are cached by the content of the file and the processing options (streamed files give
+        # different results, e.g. their text columns are never Sparse or categorical codes)
+        key = content_key(file, f"types:{'stream' if stream else 'memory'}:{engine}:"
+                                f"{'sampled' if sampled else 'full'}:{'cost' if optimize_memory else 'text'}:"
+                                f"{'sparse' if sparse else 'dense'}")
+
+        # In job mode the file is only saved here, it is processed by the job queue
+        if request.data.get('async') in ('true', '1'):
+            return self.submit_job(file, store, upload_id, key, stream, engine, sampled, optimize_memory, sparse)
+
+        try:
+            dtype_map = self.process(file, store, upload_id, key, stream, engine=engine, sampled=sampled,
+                                     optimize_memory=optimize_memory, sparse=sparse)
+
+            # Evict older uploads if the store is full
+            store.enforce_quota(upload_id)
+        except QuotaExceeded:
+            return JsonResponse({'error': 'The processed file is too large to be stored.'}, status=507)
+
+        # Map the inferred data types to user-friendly names
+        friendly_map = map_dtypes_to_user_friendly_names(dtype_map)
+
+        # Return the data type map as a JSON response, with the upload ID needed by /save-types/
+        if request.data.get('detail') in ('true', '1'):
+            details = get_column_details(store.read_json(upload_id, 'report.json'), dtype_map)
+            response = JsonResponse({'types': friendly_map, 'details': details})
+        else:
+            response = JsonResponse(friendly_map)
+        response['X-Upload-ID'] = upload_id
+        return response
+
+    def submit_job(self, file, store, upload_id, key, stream, engine='c', sampled=False, optimize_memory=False,
+                   sparse=False):
+        with store.open_atomic(upload_id, 'upload.csv') as path:
+            with open(path, 'wb') as f:
+                for chunk in file.chunks():
+                    f.write(chunk)
+        JobProgress(store, upload_id).save()
+        get_job_queue().submit('csvhandler.views.run_types_job', upload_id, key, stream, engine, sampled,
+                               optimize_memory, sparse)
+
+        # The job ID is the upload ID, the client polls /jobs/<job_id>/ until the job is done
+        response = JsonResponse({'job_id': upload_id, 'status': 'queued'}, status=202)
+        response['X-Upload-ID'] = upload_id
+        response['Location'] = reverse('csv-job', args=[upload_id])
+        return response
+
+    def process(self, source, store, upload_id, key, stream, progress=None, engine='c', sampled=False,
+                optimize_memory=False, sparse=False):
+        # The same file may have been processed already
+        cache = get_result_cache()
+        try:
+            dtype_map = cache.read_json(key, 'dtype_map.json')
+            for name in ('output.arrow', 'report.json'):
+                with store.open_atomic(upload_id, name) as path:
+                    cache.copy(key, name, path)
+        except ArtifactNotFound:
+            if stream:
+                dtype_map = self.process_streaming(source, store, upload_id, progress)
+            else:
+                dtype_map = self.process_in_memory(source, store, upload_id, cache, progress, engine, sampled,
+                                                   optimize_memory, sparse)
+
+            # Keep the results for the next upload of the same file
+            cache.store(key, {name: store.path(upload_id, name) for name in ('output.arrow', 'report.json')},
+                        dtype_map)
+
+        # Save the data type map to a JSON file for later use
+        store.write_json(upload_id, 'dtype_map.json', dtype_map)
+        return dtype_map
+
+    def process_in_memory(self, source, store, upload_id, cache, progress=None, engine='c', sampled=False,
+                          optimize_memory=False, sparse=False):
+        df = read_csv(source, engine)
+        if progress is not None:
+            progress.update(rows=len(df), total_columns=len(df.columns))
+
+        # Columns that did not change since the latest upload with the same header are not inferred again
+        key = header_key(df.columns, f"header{':cost' if optimize_memory else ''}{':sparse' if sparse else ''}")
+        fingerprints = column_fingerprints(df)
+        known = self.unchanged_columns(cache, key, fingerprints)
 
         # Use a custom function to process data and infer data types
-        processed_data = infer_and_convert_data_types(df)
+        report = {}
+        processed_data = infer_and_convert_data_types(df, known=known, missing_values_parsed=True, report=report,
+                                                      sampled=sampled, optimize_memory=optimize_memory, sparse=sparse,
+                                                      progress=progress.set_columns if progress else None)
+        store.write_json(upload_id, 'report.json', report)
 
-        # Save the processed data to a CSV file
-        processed_data.to_csv("csvhandler/files/output.csv", index=False)
+        # Save the processed data to a typed columnar file, so its data types survive until /save-types/
+        with store.open_atomic(upload_id, 'output.arrow') as path:
+            write_frame(processed_data, path)
 
         # Create a map of column names to their data types
         dtype_map = {col: str(dtype) for col, dtype in processed_data.dtypes.items()}
 
-        # Save the data type map to a JSON file for later use
-        with open('csvhandler/files/dtype_map.json', 'w') as f:
-            json.dump(dtype_map, f)
+        # This upload becomes the previous one of its header, its processed file is named after its content so
+        # the fingerprints read by a concurrent upload never describe another version of the file
+        artifact = f"output-{hashlib.sha256(json.dumps(fingerprints).encode()).hexdigest()}.arrow"
+        cache.store(key, {artifact: store.path(upload_id, 'output.arrow')}, dtype_map,
+                    {'fingerprints.json': {'artifact': artifact, 'columns': fingerprints}})
+        return dtype_map
+
+    def unchanged_columns(self, cache, key, fingerprints):
+        try:
+            previous = cache.read_json(key, 'fingerprints.json')
+            unchanged = [col for col, fingerprint in fingerprints.items() if previous['columns'].get(col) == fingerprint]
+            if not unchanged:
+                return {}
+
+            # Only the unchanged columns are read from the previous processed file
+            previous_data = read_frame(cache.path(key, previous['artifact']), columns=unchanged)
+        except (ArtifactNotFound, FileNotFoundError):
+            return {}
+
+        return {col: previous_data[col] for col in unchanged}
+
+    def process_streaming(self, source, store, upload_id, progress=None):
+        # Infer the data types chunk by chunk
+        dtype_map, states = infer_dtypes_streaming(source, progress=progress.set_rows if progress else None)
+        if progress is not None:
+            progress.update(columns=len(dtype_map), total_columns=len(dtype_map))
+
+        # Save the processed data to a typed columnar file, read again and converted chunk by chunk
+        # (an uploaded file is rewound, a path is simply opened again)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        with store.open_atomic(upload_id, 'output.arrow') as path:
+            write_converted_chunks(source, path, states, 'arrow')
+
+        # Every row was read, nothing was sampled, the distinct values were counted with bounded memory
+        distinct_values = {col: state.distinct_count for col, state in states.items()}
+        store.write_json(upload_id, 'report.json', {'distinct_values': distinct_values})
+
+        return dtype_map
+
+
+def run_types_job(upload_id, key, stream, engine='c', sampled=False, optimize_memory=False, sparse=False):
+    """
+    Background job of /types/ in job mode: processes the file saved by CSVTypesView.submit_job.
+
+    Args:
+        upload_id (str): The upload ID, also the job ID.
+        key (str): The result cache key of the file.
+        stream (bool): Process the file chunk by chunk.
+        engine (str): The CSV parser of a file processed as a whole, "arrow" or "c".
+        sampled (bool): Choose the data types on samples of the rows (see processor.main.infer_column_sampled).
+        optimize_memory (bool): Store the text columns in their cheapest representation (see
+                                processor.representation.choose_representation).
+        sparse (bool): Store the columns made mostly of missing values as Sparse columns (see
+                       processor.representation.sparse_column).
+    """
+    store = get_artifact_store()
+    progress = JobProgress(store, upload_id)
+    try:
+        progress.start()
+        source = store.path(upload_id, 'upload.csv')
+        dtype_map = CSVTypesView().process(source, store, upload_id, key, stream, progress, engine, sampled,
+                                           optimize_memory, sparse)
+
+        # The uploaded file is not needed any more
+        os.remove(source)
+        store.enforce_quota(upload_id)
+        progress.finish(len(dtype_map))
+    except ArtifactNotFound:
+        # The upload expired or was evicted before the job could run, there is nothing to report to
+        return
+    except QuotaExceeded:
+        progress.fail('The processed file is too large to be stored.')
+    except Exception as e:
+        progress.fail(f"The file could not be processed: {e}")
+        raise
+
+
+"""
+CSVJobStatusView: Django APIView to report the progress of a /types/ job and serve its result.
+
+Description:
+/types/ called with async=true saves the file, queues its processing (see jobs.JobQueue) and immediately returns 
+a job ID, which is also the upload ID. The client polls this view until the job is done.
+
+Returns:
+- A JSON object with the status of the job ("queued", "running", "done" or "failed"), the number of rows read 
+and of columns processed so far and the total number of columns.
+- Once the job is done, the dict of column names to user-friendly data types in "types", the job ID can then be 
+sent to /save-types/ as the upload ID. With ?detail=true, the details of every column in "details" (see CSVTypesView).
+- The reason of the failure in "error" if the job failed, 404 if the job is unknown or expired.
+"""
 
-        # Map the inferred data types to user-friendly names
-        dtype_map = map_dtypes_to_user_friendly_names(dtype_map)
 
-        # Return the data type map as a JSON response
-        return JsonResponse(dtype_map)
+class CSVJobStatusView(APIView):
+    def get(self, request, job_id, *args, **kwargs):
+        store = get_artifact_store()
+        try:
+            job = store.read_json(job_id, 'job.json')
+        except ArtifactNotFound:
+            return JsonResponse({'error': 'The job is unknown or has expired.'}, status=404)
+
+        # The result is only served once the job is done
+        if job['status'] == 'done':
+            dtype_map = store.read_json(job_id, 'dtype_map.json')
+            job['types'] = map_dtypes_to_user_friendly_names(dtype_map)
+            if request.query_params.get('detail') in ('true', '1'):
+                job['details'] = get_column_details(store.read_json(job_id, 'report.json'), dtype_map)
+
+        response = JsonResponse({'job_id': job_id, **job})
+        response['X-Upload-ID'] = job_id
+        return response
 
 """
 CSVSaveViewAndDownload: Django APIView to process updated data type dict, 
@@ -122,7 +447,8 @@ coerce data types in a DataFrame accordingly, and provide the updated data as a
 
 Description:
 This view receives a JSON string from the front-end representing the updated relationships 
-between column attributes and their desired data types (as modified by the user). 
+between column attributes and their desired data types (as modified by the user), and the upload ID 
+returned by /types/ (the "upload_id" field or the "X-Upload-ID" header). 
 It compares this dict with the original data type dict stored on the server. If there are differences:
 1. Coerces the affected columns to the specified data types.
 2. Saves the updated DataFrame to a file.
@@ -130,16 +456,22 @@ It compares this dict with the original data type dict stored on the server. If
 
 Key Functionalities:
 - Retrieve and parse the updated data type dict from the front-end.
-- Load the previously processed CSV and its original data type dict.
+- Load the previously processed data (already typed, nothing is parsed again) and its original data type dict.
 - Compare the updated dict with the original and identify differences.
 - Coerce columns to the specified types where changes are detected.
-- Save the updated data and send it as a downloadable CSV to the client.
+- Save the updated data and send it as a downloadable CSV to the client, streamed and encoded in batches of
+  CSV_DOWNLOAD_BATCH_ROWS rows (see downloads.csv_chunks).
+- Send Parquet, Feather or an Arrow IPC stream instead with the "format" field ("csv", "parquet", "feather"
+  or "arrow") and the optional "compression" field, the data types are kept in the file schema.
 
 Error Handling:
-- Handles cases where the original data type dict file is missing with an appropriate JSON response.
+- Handles cases where the upload ID is missing or unknown, or its artifacts have expired, with an appropriate 
+JSON response.
+- Answers 400 if the format or compression is not supported.
 
 Returns:
-- A downloadable CSV file containing the updated data.
+- A downloadable CSV file containing the updated data ("output.csv", or "output.parquet", "output.feather" or 
+"output.arrows" in the other formats).
 
 Example Usage:
 - User modifies column data types via a front-end UI and submits the changes.
@@ -156,21 +488,37 @@ class CSVSaveViewAndDownload(APIView):
         # Parse the JSON string into a Python dictionary
         updated_map = json.loads(updated_map_str)
 
-        # Load the previously processed DataFrame from the saved file
-        df = pd.read_csv("csvhandler/files/output.csv")
+        # The upload whose data types were modified
+        upload_id = request.data.get('upload_id') or request.headers.get('X-Upload-ID')
+        store = get_artifact_store()
+
+        # The format of the download (CSV by default)
+        try:
+            file_format, compression = download_format(request.data)
+        except DownloadFormatError as e:
+            return JsonResponse({'error': str(e)}, status=400)
 
         # Load the original data type dict from the JSON file
         try:
-            with open('csvhandler/files/dtype_map.json', 'r') as f:
-                dtype_map = json.load(f)
-        except FileNotFoundError:
+            dtype_map = store.read_json(upload_id, 'dtype_map.json')
+        except ArtifactNotFound:
             # Handle missing JSON file with an error response
-            return JsonResponse({'error': 'dtype_map file is missing. Please re-upload and save again.'}, status=400)
+            return JsonResponse({'error': 'The upload is missing or has expired. Please re-upload and save again.'}, status=400)
 
         # Map user-friendly data type names back to the original data types
         updated_map = map_user_friendly_names_to_dtypes(updated_map)
 
+        # Compared as the client saw them: a column of Arrow-backed strings left as "Text" is not changed
+        dtype_map = map_user_friendly_names_to_dtypes(map_dtypes_to_user_friendly_names(dtype_map))
+
+        # Without any change the saved file is sent as it is, batch by batch
+        path = store.path(upload_id, 'output.arrow')
+        batches = partial(iter_frames, path, download_batch_rows())
+
         if updated_map != dtype_map:
+            # Load the previously processed DataFrame from the saved file, already typed (memory-mapped, not parsed)
+            df = read_frame(path)
+
             # Detect differences between the original and updated data type dict
             difference_map = get_differences(updated_map, dtype_map)
 
@@ -178,18 +526,19 @@ class CSVSaveViewAndDownload(APIView):
             df = forced_to_bool(df, difference_map)
 
             # Save the updated DataFrame back to the same file
-            df.to_csv("csvhandler/files/output.csv", index=False)
+            with store.open_atomic(upload_id, 'output.arrow') as temporary_path:
+                write_frame(df, temporary_path)
 
-        # Convert the DataFrame to a CSV string
-        csv_file = io.StringIO()
-        df.to_csv(csv_file, index=False)
-        csv_file.seek(0)  # Reset the file pointer
+            # The saved types become the original ones, so saving the previous types again converts back
+            store.write_json(upload_id, 'dtype_map.json', {col: str(dtype) for col, dtype in df.dtypes.items()})
+            batches = partial(frame_batches, df, download_batch_rows())
 
-        # Create an HTTP response containing the CSV file for download
-        response = HttpResponse(csv_file.getvalue(), content_type='text/csv')
+        # Create an HTTP response streaming the file for download, converted batch by batch
+        chunks = download_chunks(batches, file_format, compression)
+        response = StreamingHttpResponse(chunks, content_type=download_content_type(file_format))
 
         # Set the file name for the download prompt in the browser
-        response['Content-Disposition'] = 'attachment; filename="output.csv"'
+        response['Content-Disposition'] = f'attachment; filename="{download_name("output", file_format)}"'
         return response
 
 
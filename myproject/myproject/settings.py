@@ -76,6 +76,28 @@ STATIC_ROOT = os.path.join('./', 'staticfiles')
 
 # CORS configuration - Allow cross-origin requests from all domains (useful for development)
 CORS_ALLOW_ALL_ORIGINS = True  # Allow requests from all origins, should be more restrictive in production
+CORS_EXPOSE_HEADERS = ['X-Upload-ID', 'Content-Disposition']  # Response headers the front end can read
+
+# Per-upload artifact store (processed file and data type map of every upload, keyed by upload ID)
+# Several workers can share it as long as they see the same directory
+CSV_ARTIFACT_ROOT = os.path.join('csvhandler', 'files', 'uploads')  # One sub-directory per upload
+CSV_ARTIFACT_TTL_SECONDS = 60 * 60  # Artifacts not accessed for this long are deleted
+CSV_ARTIFACT_QUOTA_BYTES = 5 * 1024 ** 3  # Least recently used uploads are deleted above this total size
+
+# Result cache (data type map and processed file of previous uploads, keyed by a hash of the file content
+# and of the inference configuration), the same file uploaded again is not processed again
+CSV_RESULT_CACHE_ROOT = os.path.join('csvhandler', 'files', 'cache')  # One sub-directory per cached file
+CSV_RESULT_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # Entries not hit for this long are deleted
+CSV_RESULT_CACHE_QUOTA_BYTES = 1024 ** 3  # Least recently hit entries are deleted above this total size
+
+# Background jobs of types/ called with async=true (see csvhandler.jobs)
+# The backend can be replaced by any csvhandler.jobs.JobQueue, e.g. one handing the tasks to a message broker,
+# 'csvhandler.jobs.InlineJobQueue' runs the jobs inside the request
+CSV_JOB_QUEUE_BACKEND = 'csvhandler.jobs.LocalJobQueue'  # Thread pool of the web server process
+CSV_JOB_QUEUE_OPTIONS = {'workers': 2}  # Keyword arguments of the backend
+
+# CSV downloads (upload/ and save-types/) are streamed, encoded this many rows at a time
+CSV_DOWNLOAD_BATCH_ROWS = 50_000
 
 # ALLOWED_HOSTS defines which domains can access your Django app (use '*' for all domains in development)
 ALLOWED_HOSTS = ['*']  # Allow all hosts in development, but should be restricted to specific domain names in production